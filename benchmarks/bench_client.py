@@ -0,0 +1,139 @@
+# End-to-end benchmarks for mangadex.py hot paths against local MangaDex API stand-in server.
+#
+# Usage: python -m benchmarks.bench_client [--total 5000] [--latency 0.005]
+
+import argparse
+import asyncio
+import time
+from mangadex.client import Client
+from mangadex.http import RequestHooks
+from .server import MangaDexStandIn
+
+class LatencyRecorder(RequestHooks):
+    """Record latency of every request (queued + wire + decode)"""
+    def __init__(self) -> None:
+        self.latencies = []
+
+    def on_response(self, route, status, queued, wire, decode):
+        self.latencies.append(queued + wire + decode)
+
+def percentile(values, q):
+    if not values:
+        return 0
+    values = sorted(values)
+    pos = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[pos]
+
+class Result:
+    def __init__(self, name, items, elapsed, latencies) -> None:
+        self.name = name
+        self.items = items
+        self.elapsed = elapsed
+        self.latencies = latencies
+
+    def __str__(self) -> str:
+        return '%-28s %8s items %9.3fs %11.1f items/s  p50 %7.2fms  p99 %7.2fms' % (
+            self.name,
+            self.items,
+            self.elapsed,
+            self.items / self.elapsed if self.elapsed else 0,
+            percentile(self.latencies, 50) * 1000,
+            percentile(self.latencies, 99) * 1000
+        )
+
+async def bench_search_flatten(base_url, limit, **client_options) -> Result:
+    recorder = LatencyRecorder()
+    client = Client(base_url=base_url, hooks=[recorder], **client_options)
+    try:
+        started = time.perf_counter()
+        mangas = await client.search_manga(limit=limit).flatten()
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+    return Result('search_manga().flatten()', len(mangas), elapsed, recorder.latencies)
+
+async def bench_concurrent_search(base_url, limit, concurrency, **client_options) -> Result:
+    recorder = LatencyRecorder()
+    client = Client(base_url=base_url, hooks=[recorder], **client_options)
+    try:
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            client.search_manga(limit=limit).flatten() for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+    return Result(
+        'concurrent search (x%s)' % concurrency,
+        sum(len(i) for i in results),
+        elapsed,
+        recorder.latencies
+    )
+
+async def bench_login(base_url, rounds, **client_options) -> Result:
+    recorder = LatencyRecorder()
+    client = Client(base_url=base_url, hooks=[recorder], **client_options)
+    try:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await client._http.login(username='benchmark', password='benchmark-password')
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+    return Result('login', rounds, elapsed, recorder.latencies)
+
+async def bench_refresh(base_url, rounds, **client_options) -> Result:
+    recorder = LatencyRecorder()
+    client = Client(base_url=base_url, auto_refresh_session=False, **client_options)
+    try:
+        await client.login(username='benchmark', password='benchmark-password')
+        client._http.add_hook(recorder)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            # Refresh token is rotated on every refresh
+            result = await client._http.refresh_token(client._refresh_token)
+            client._session_token = result.session_token
+            client._refresh_token = result.refresh_token
+        elapsed = time.perf_counter() - started
+    finally:
+        await client.close()
+    return Result('refresh session', rounds, elapsed, recorder.latencies)
+
+async def run(args):
+    server = MangaDexStandIn(
+        total=args.total,
+        latency=args.latency,
+        ratelimit=args.ratelimit
+    )
+    base_url = await server.start()
+    limit = min(args.total, 10000)
+    try:
+        results = [
+            await bench_search_flatten(base_url, limit),
+            await bench_concurrent_search(base_url, limit, args.concurrency),
+            await bench_login(base_url, args.rounds),
+            await bench_refresh(base_url, args.rounds)
+        ]
+    finally:
+        await server.close()
+
+    print('total manga: %s, server latency: %sms, server requests: %s' % (
+        args.total,
+        args.latency * 1000,
+        server.requests
+    ))
+    for result in results:
+        print(result)
+
+def main():
+    parser = argparse.ArgumentParser(description='mangadex.py end-to-end benchmarks')
+    parser.add_argument('--total', type=int, default=5000, help='Total synthetic manga')
+    parser.add_argument('--latency', type=float, default=0, help='Server latency for each response (in seconds)')
+    parser.add_argument('--ratelimit', type=int, default=None, help='Server requests allowed per second')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent searches')
+    parser.add_argument('--rounds', type=int, default=100, help='Rounds for login benchmarks')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == '__main__':
+    main()
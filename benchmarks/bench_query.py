@@ -0,0 +1,71 @@
+# Microbenchmark for MangaList query building, per page.
+#
+# Compares constructing MangaList for every page (the whole search is
+# validated again) with MangaList.with_page() (the search is validated once,
+# then only offset and limit). Both cases use the current validators,
+# so this measures construct vs with_page, not the validation code
+# before the validators were precompiled.
+#
+# Usage: python -m benchmarks.bench_query [--pages 100000]
+
+import argparse
+import time
+from mangadex.routes.manga import MangaList
+from mangadex.types import ContentRating, MangaDexLanguage, Relationship
+from mangadex.utils.manga import MangaListOrder
+
+_SEARCH = {
+    'title': 'synthetic',
+    'authors': None,
+    'artists': None,
+    'year': None,
+    'included_tags': [
+        '423e2eae-a7a2-4a8b-ac03-a8351462d71d',
+        '391b0423-d847-456f-aff0-8b0cfc03066b'
+    ],
+    'included_tags_mode': 'AND',
+    'excluded_tags': None,
+    'excluded_tags_mode': 'OR',
+    'status': None,
+    'original_language': [MangaDexLanguage.Japanese],
+    'excluded_original_language': None,
+    'available_translated_language': [MangaDexLanguage.English],
+    'ids': None,
+    'content_rating': [ContentRating.SAFE, ContentRating.SUGGESTIVE],
+    'created_at_since': '2020-01-01T00:00:00',
+    'updated_at_since': None,
+    'order': MangaListOrder(created_at='desc'),
+    'includes': [Relationship.AUTHOR, Relationship.ARTIST],
+}
+
+def bench_construct(pages: int) -> float:
+    # Construct (and validate) the whole search on every page
+    started = time.perf_counter()
+    for page in range(pages):
+        MangaList(limit=100, offset=page * 100, **_SEARCH).build_request()
+    return time.perf_counter() - started
+
+def bench_with_page(pages: int) -> float:
+    # Validate the search once, then only offset and limit
+    started = time.perf_counter()
+    route = MangaList(limit=100, offset=0, **_SEARCH)
+    for page in range(pages):
+        route.with_page(page * 100, 100).build_request()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description='MangaList query building microbenchmark (construct vs with_page)')
+    parser.add_argument('--pages', type=int, default=100000, help='Total pages to build')
+    args = parser.parse_args()
+
+    for name, func in (('MangaList() per page', bench_construct), ('MangaList.with_page()', bench_with_page)):
+        elapsed = func(args.pages)
+        print('%-24s %8s pages %9.3fs %8.2fus/page' % (
+            name,
+            args.pages,
+            elapsed,
+            elapsed / args.pages * 1000000
+        ))
+
+if __name__ == '__main__':
+    main()
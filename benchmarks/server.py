@@ -0,0 +1,333 @@
+# Local MangaDex API stand-in server for benchmarks.
+# Only endpoints used by mangadex.py are implemented, with synthetic data.
+#
+# Usage: python -m benchmarks.server --port 8080 --total 5000
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from aiohttp import web
+
+__all__ = (
+    'MangaDexStandIn',
+)
+
+# According to https://api.mangadex.org/docs.html#section/Result-Limit
+RESULT_LIMIT = 10000
+
+_STATUSES = ('ongoing', 'completed', 'hiatus', 'cancelled')
+_CONTENT_RATINGS = ('safe', 'suggestive', 'erotica')
+_LANGUAGES = ('ja', 'ko', 'zh', 'en')
+_ORDER_KEYS = {
+    'createdAt': 'createdAt',
+    'updatedAt': 'updatedAt',
+    'year': 'year',
+    'title': 'title'
+}
+
+def _format_date(dt: datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+def _parse_date(value: str) -> datetime:
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+
+class MangaDexStandIn:
+    """Stand-in server for MangaDex API
+
+    Parameters
+    -----------
+    total: :class:`int`
+        Total synthetic manga.
+    latency: :class:`float`
+        Latency (in seconds) added to each response.
+    ratelimit: Optional[:class:`int`]
+        Global requests allowed per ``ratelimit_window``, ``None`` to disable rate limit.
+    ratelimit_window: :class:`float`
+        Rate limit window (in seconds).
+    authors: :class:`int`
+        Total synthetic authors and artists, shared across manga.
+    tags: :class:`int`
+        Total synthetic tags, shared across manga.
+    seed: :class:`int`
+        Seed for synthetic data.
+    """
+    def __init__(
+        self,
+        total: int = 1000,
+        latency: float = 0,
+        ratelimit: int = None,
+        ratelimit_window: float = 1,
+        authors: int = 200,
+        tags: int = 50,
+        seed: int = 0
+    ) -> None:
+        self.total = total
+        self.latency = latency
+        self.ratelimit = ratelimit
+        self.ratelimit_window = ratelimit_window
+        self.requests = 0
+
+        self._ratelimit_reset = 0
+        self._ratelimit_remaining = 0
+        self._sessions = {}
+        self._refresh_tokens = {}
+        self._runner = None
+
+        rng = random.Random(seed)
+        self._authors = [self._make_uuid(rng) for _ in range(authors)]
+        self._tags = [self._make_uuid(rng) for _ in range(tags)]
+        self.manga = [self._make_manga(rng, pos) for pos in range(total)]
+        self._manga_by_id = {i['id']: i for i in self.manga}
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get('/manga', self.manga_list)
+        self.app.router.add_post('/auth/login', self.login)
+        self.app.router.add_get('/auth/check', self.check)
+        self.app.router.add_post('/auth/refresh', self.refresh)
+        self.app.router.add_post('/auth/logout', self.logout)
+
+    def _make_uuid(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def _make_manga(self, rng: random.Random, pos: int) -> dict:
+        base = datetime(2018, 1, 1, tzinfo=timezone.utc)
+        created_at = base + timedelta(hours=pos, minutes=rng.randrange(60))
+        updated_at = created_at + timedelta(days=rng.randrange(365))
+        author = rng.choice(self._authors)
+        artist = rng.choice(self._authors)
+        return {
+            'id': self._make_uuid(rng),
+            'type': 'manga',
+            'attributes': {
+                'title': {'en': 'Synthetic Manga %s' % pos},
+                'altTitles': [
+                    {'ja': '合成マンガ %s' % pos},
+                    {'ko': '합성 만화 %s' % pos}
+                ],
+                'description': {'en': 'Description of synthetic manga %s' % pos},
+                'isLocked': False,
+                'links': {
+                    'al': str(rng.randrange(1, 100000)),
+                    'mal': str(rng.randrange(1, 100000)),
+                    'mu': str(rng.randrange(1, 100000)),
+                    'raw': 'https://example.com/%s' % pos
+                },
+                'originalLanguage': rng.choice(_LANGUAGES),
+                'lastVolume': None,
+                'lastChapter': None,
+                'publicationDemographic': None,
+                'status': rng.choice(_STATUSES),
+                'year': rng.randrange(1980, 2022),
+                'contentRating': rng.choice(_CONTENT_RATINGS),
+                'tags': [
+                    {
+                        'id': tag,
+                        'type': 'tag',
+                        'attributes': {'name': {'en': 'Tag %s' % self._tags.index(tag)}}
+                    }
+                    for tag in rng.sample(self._tags, 3)
+                ],
+                'createdAt': _format_date(created_at),
+                'updatedAt': _format_date(updated_at),
+                'version': 1
+            },
+            'relationships': [
+                {'id': author, 'type': 'author'},
+                {'id': artist, 'type': 'artist'},
+                {'id': self._make_uuid(rng), 'type': 'cover_art'}
+            ]
+        }
+
+    def _error(self, status: int, detail: str, headers: dict = None) -> web.Response:
+        return web.json_response(
+            {
+                'result': 'error',
+                'errors': [{
+                    'id': str(uuid.uuid4()),
+                    'status': status,
+                    'title': web.Response(status=status).reason,
+                    'detail': detail
+                }]
+            },
+            status=status,
+            headers=headers
+        )
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.ratelimit is None:
+            return await handler(request)
+
+        now = time.time()
+        if now >= self._ratelimit_reset:
+            self._ratelimit_reset = now + self.ratelimit_window
+            self._ratelimit_remaining = self.ratelimit
+
+        headers = {
+            'x-ratelimit-limit': str(self.ratelimit),
+            'x-ratelimit-retry-after': str(self._ratelimit_reset)
+        }
+        if self._ratelimit_remaining <= 0:
+            headers['x-ratelimit-remaining'] = '0'
+            return self._error(429, 'You are being rate limited', headers)
+
+        self._ratelimit_remaining -= 1
+        headers['x-ratelimit-remaining'] = str(self._ratelimit_remaining)
+        resp = await handler(request)
+        resp.headers.update(headers)
+        return resp
+
+    def _get_session(self, request: web.Request):
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return None
+        return self._sessions.get(auth[len('Bearer '):])
+
+    def _new_token(self, user: str) -> dict:
+        session = uuid.uuid4().hex
+        refresh = uuid.uuid4().hex
+        self._sessions[session] = user
+        self._refresh_tokens[refresh] = user
+        return {'session': session, 'refresh': refresh}
+
+    async def manga_list(self, request: web.Request) -> web.Response:
+        query = request.query
+        try:
+            limit = int(query.get('limit', 10))
+            offset = int(query.get('offset', 0))
+        except ValueError:
+            return self._error(400, 'limit and offset must be integer')
+
+        if limit > 100 or limit < 0:
+            return self._error(400, 'limit range must be from 0 to 100')
+        elif offset + limit > RESULT_LIMIT:
+            return self._error(400, 'You can only request up to %s results' % RESULT_LIMIT)
+
+        results = self.manga
+        ids = query.getall('ids[]', None)
+        if ids:
+            results = [self._manga_by_id[i] for i in ids if i in self._manga_by_id]
+
+        title = query.get('title')
+        if title:
+            title = title.lower()
+            results = [i for i in results if title in i['attributes']['title']['en'].lower()]
+
+        for param, attr in (('createdAtSince', 'createdAt'), ('updatedAtSince', 'updatedAt')):
+            value = query.get(param)
+            if value:
+                try:
+                    since = _format_date(_parse_date(value))
+                except ValueError:
+                    return self._error(400, '%s is not valid datetime' % param)
+                results = [i for i in results if i['attributes'][attr] >= since]
+
+        for key, attr in _ORDER_KEYS.items():
+            order = query.get('order[%s]' % key)
+            if order:
+                results = sorted(
+                    results,
+                    key=lambda i: i['attributes'][attr] if attr != 'title' else i['attributes']['title']['en'],
+                    reverse=order == 'desc'
+                )
+
+        includes = set(query.getall('includes[]', ()))
+        data = results[offset:offset + limit]
+        if includes:
+            data = [self._include(i, includes) for i in data]
+
+        return web.json_response({
+            'result': 'ok',
+            'response': 'collection',
+            'data': data,
+            'limit': limit,
+            'offset': offset,
+            'total': len(results)
+        })
+
+    def _include(self, manga: dict, includes: set) -> dict:
+        relationships = []
+        for rel in manga['relationships']:
+            if rel['type'] in includes:
+                rel = dict(rel)
+                if rel['type'] == 'cover_art':
+                    rel['attributes'] = {'fileName': '%s.jpg' % rel['id'], 'volume': None}
+                else:
+                    rel['attributes'] = {'name': 'Author %s' % self._authors.index(rel['id'])}
+            relationships.append(rel)
+        return dict(manga, relationships=relationships)
+
+    async def login(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        user = data.get('username') or data.get('email')
+        if not user or not data.get('password'):
+            return self._error(400, 'username or email and password is required')
+        return web.json_response({'result': 'ok', 'token': self._new_token(user)})
+
+    async def check(self, request: web.Request) -> web.Response:
+        authenticated = self._get_session(request) is not None
+        return web.json_response({
+            'result': 'ok',
+            'isAuthenticated': authenticated,
+            'roles': ['ROLE_USER'] if authenticated else ['ROLE_GUEST'],
+            'permissions': []
+        })
+
+    async def refresh(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        user = self._refresh_tokens.pop(data.get('token'), None)
+        if user is None:
+            return self._error(401, 'Invalid refresh token')
+        return web.json_response({
+            'result': 'ok',
+            'token': self._new_token(user),
+            'message': 'Token refreshed'
+        })
+
+    async def logout(self, request: web.Request) -> web.Response:
+        auth = request.headers.get('Authorization', '')
+        if self._sessions.pop(auth[len('Bearer '):], None) is None:
+            return self._error(401, 'Invalid session token')
+        return web.json_response({'result': 'ok'})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start the server and return its base url"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return 'http://%s:%s' % (host, port)
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def main():
+    parser = argparse.ArgumentParser(description='MangaDex API stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--total', type=int, default=1000, help='Total synthetic manga')
+    parser.add_argument('--latency', type=float, default=0, help='Latency for each response (in seconds)')
+    parser.add_argument('--ratelimit', type=int, default=None, help='Requests allowed per rate limit window')
+    parser.add_argument('--ratelimit-window', type=float, default=1, help='Rate limit window (in seconds)')
+    args = parser.parse_args()
+
+    server = MangaDexStandIn(
+        total=args.total,
+        latency=args.latency,
+        ratelimit=args.ratelimit,
+        ratelimit_window=args.ratelimit_window
+    )
+    web.run_app(server.app, host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
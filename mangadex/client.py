@@ -1,13 +1,30 @@
 import asyncio
-from typing import List, Literal, Union
+import functools
+import logging
+import time
+from typing import List, Literal, Optional, Union
 from datetime import datetime
-from .http import HTTPClient
+from .http import (
+    HTTPClient, ResponseCache, JSONCodec,
+    RetryPolicy, RequestHooks, Transport
+)
 from .routes import *
 from .errors import *
 from .routes.base import * 
 from .types import *
 from .utils import *
 from .iterators import *
+from .watermark import *
+from .manga import *
+from .entity import *
+from .pool import *
+from .token_store import *
+from .routes.auth import SESSION_TOKEN_LIFETIME, SESSION_REFRESH_MARGIN
+
+log = logging.getLogger(__name__)
+
+# Delay before retrying failed background session refresh
+SESSION_REFRESH_RETRY_DELAY = 10
 
 class Client:
     """MangaDex Client
@@ -17,23 +34,260 @@ class Client:
     loop: :class:`asyncio.AbstractEventLoop`
         Set asyncio event loop.
     auto_refresh_session: :class:`bool`
-        If this ``True`` the session will be refreshed each time user do action
-        that require authentication (except for :meth:`Client.logout()`).
+        If this ``True`` the session token will be refreshed in background
+        before it's expired, so authenticated requests never wait for refreshing session.
+    ratelimit: :class:`bool`
+        If this ``True``, every request will be metered by built-in rate limiter
+        (global limit and restricted endpoints limit) and resynced from
+        MangaDex rate limit headers, so requests are held before hitting
+        rate limit instead of retrying after ``429`` response.
+    cache: Optional[:class:`ResponseCache`]
+        Response cache for ``GET`` requests that doesn't require authentication.
+        Disabled by default.
+    coalesce_requests: :class:`bool`
+        If this ``True``, concurrent identical ``GET`` requests that doesn't require
+        authentication will share one in-flight request and receive the same result.
+    connection_limit: :class:`int`
+        Total number of simultaneous connections in connection pool,
+        ``0`` for unlimited. (default to ``100``)
+    connection_limit_per_host: :class:`int`
+        Number of simultaneous connections to the same host,
+        ``0`` for unlimited. (default to ``0``)
+    keepalive_timeout: :class:`float`
+        How long (in seconds) idle connections are kept alive in connection pool.
+        (default to ``15``)
+    dns_cache_ttl: Optional[:class:`int`]
+        How long (in seconds) resolved DNS are cached, ``None`` to disable DNS cache.
+        (default to ``10``)
+    connect_timeout: Optional[:class:`float`]
+        Timeout (in seconds) for connecting to the server.
+        (default to ``None``, aiohttp default 30 seconds is used)
+    read_timeout: Optional[:class:`float`]
+        Timeout (in seconds) for reading a portion of data from the server.
+        (default to ``None``, no timeout)
+
+        Every request is also limited to 300 seconds in total.
+    json_codec: Optional[:class:`JSONCodec`]
+        JSON codec for request and response bodies, if not given
+        the fastest available codec will be used (orjson, ujson, and then python built-in json).
+    retry_policy: Optional[:class:`RetryPolicy`]
+        Retry policy for HTTP requests (attempts, backoff, deadline and circuit breaker),
+        if not given the default :class:`RetryPolicy` will be used.
+    hooks: Optional[List[:class:`RequestHooks`]]
+        Request instrumentation hooks, use :class:`MetricsCollector`
+        for built-in in-memory latency histograms and counters.
+    transport: Optional[:class:`Transport`]
+        Transport used to send requests, use :class:`RecordingTransport` and
+        :class:`ReplayTransport` to record and replay requests without network.
+        Default to :class:`AiohttpTransport`.
+    base_url: Optional[:class:`str`]
+        Use another base URL instead of ``https://api.mangadex.org``,
+        for example a local MangaDex API stand-in server.
+    entity_cache: Optional[:class:`EntityCache`]
+        Identity map for related entities (authors, artists, tags)
+        shared by all manga, if not given a new one will be created.
+    token_store: Optional[:class:`TokenStore`]
+        Persist session and refresh tokens, so :meth:`Client.login()`
+        reuse (or refresh) stored tokens instead of logging in again,
+        use :class:`FileTokenStore` to store them in a file.
     """
     def __init__(
         self,
         loop: asyncio.AbstractEventLoop = None,
-        auto_refresh_session: bool = True
+        auto_refresh_session: bool = True,
+        ratelimit: bool = False,
+        cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = False,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        dns_cache_ttl: Optional[int] = 10,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        json_codec: Optional[JSONCodec] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hooks: Optional[List[RequestHooks]] = None,
+        transport: Optional[Transport] = None,
+        base_url: Optional[str] = None,
+        entity_cache: Optional[EntityCache] = None,
+        token_store: Optional[TokenStore] = None
     ) -> None:
         self._session_token = None
         self._refresh_token = None
+        self._token_refreshed_at = None
+        self._refresh_task = None
+        self._token_store = token_store
+        self._token_name = None
         self._auto_refresh_session = auto_refresh_session
         self._logged_in = asyncio.Event()
-        self._http = HTTPClient(loop=loop)
+        self._http = HTTPClient(
+            loop=loop,
+            ratelimit=ratelimit,
+            cache=cache,
+            coalesce=coalesce_requests,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            json_codec=json_codec,
+            retry_policy=retry_policy,
+            hooks=hooks,
+            transport=transport,
+            base_url=base_url,
+            entities=entity_cache
+        )
 
         # For thread-safe operations login and logout
         self._auth_lock = asyncio.Lock()
 
+    @property
+    def entities(self) -> EntityCache:
+        """Identity map of related entities returned in manga"""
+        return self._http.entities
+
+    def get_entity(self, _type: Relationship, _id: str) -> Optional[Entity]:
+        """Get related entity (author, artist, tag, ...) from
+        identity map without network, return ``None`` if it's not found
+
+        Parameters
+        -----------
+        _type: Union[:class:`Relationship`, :class:`str`]
+            Type of the entity.
+        _id: :class:`str`
+            ID of the entity.
+        """
+        return self._http.entities.get(_type, _id)
+
+    def pool_stats(self) -> dict:
+        """Return connection pool statistics
+
+        Returns
+        --------
+        :class:`dict`
+            Contains ``limit``, ``limit_per_host``, ``acquired`` (connections in use),
+            ``idle`` (connections kept alive in the pool) and ``sessions_created``.
+        """
+        return self._http.pool_stats()
+
+    async def close(self):
+        """Close the HTTP session and its connection pool"""
+        self._cancel_refresh_task()
+        await self._http.close_session()
+
+    def _token_age(self) -> float:
+        return time.monotonic() - self._token_refreshed_at
+
+    def _is_token_stale(self) -> bool:
+        return self._token_age() >= SESSION_TOKEN_LIFETIME - SESSION_REFRESH_MARGIN
+
+    def _set_tokens(self, result, refreshed_at: float = None):
+        self._session_token = result.session_token
+        self._refresh_token = result.refresh_token
+        self._logged_in.set()
+
+        if refreshed_at is None:
+            self._token_refreshed_at = time.monotonic()
+            if self._token_store is not None and self._token_name is not None:
+                self._token_store.save(
+                    self._token_name,
+                    StoredToken(result.session_token, result.refresh_token, time.time())
+                )
+        else:
+            # Restored tokens
+            self._token_refreshed_at = time.monotonic() - max(time.time() - refreshed_at, 0)
+
+        if self._auto_refresh_session and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.ensure_future(self._refresh_session_loop())
+
+    def _cancel_refresh_task(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    async def _refresh_session(self):
+        # Must be called with _auth_lock acquired
+        result = await self._http.refresh_token(self._refresh_token)
+        self._set_tokens(result)
+        log.debug('Session token is refreshed')
+
+    async def _refresh_session_loop(self):
+        # Refresh session token ahead of its expiry
+        while self._logged_in.is_set():
+            delay = SESSION_TOKEN_LIFETIME - SESSION_REFRESH_MARGIN - self._token_age()
+            await asyncio.sleep(max(delay, 0))
+            try:
+                async with self._auth_lock:
+                    if not self._logged_in.is_set():
+                        return
+                    elif self._is_token_stale():
+                        await self._refresh_session()
+            except ServerError as e:
+                log.warning('Failed to refresh session token, retrying in %ss (%r)' % (SESSION_REFRESH_RETRY_DELAY, e))
+                await asyncio.sleep(SESSION_REFRESH_RETRY_DELAY)
+            except HTTPException as e:
+                # Refresh token is rejected, the session must be logged in again
+                log.warning('Failed to refresh session token, stopping background refresh (%r)' % e)
+                return
+            except MangaDexException as e:
+                log.warning('Failed to refresh session token, retrying in %ss (%r)' % (SESSION_REFRESH_RETRY_DELAY, e))
+                await asyncio.sleep(SESSION_REFRESH_RETRY_DELAY)
+
+    def _get_token_name(self, password=None, username=None, email=None) -> Optional[str]:
+        # Same parameters as Login route
+        return username or email
+
+    async def _restore_session(self) -> bool:
+        # Must be called with _auth_lock acquired
+        token = self._token_store.load(self._token_name)
+        if token is None:
+            return False
+
+        self._set_tokens(token, token.refreshed_at)
+        if not self._is_token_stale():
+            log.debug('Session is restored from token store')
+            return True
+
+        try:
+            await self._refresh_session()
+        except MangaDexException as e:
+            log.debug('Failed to refresh restored session (%r)' % e)
+            self._clear_tokens()
+            return False
+        log.debug('Session is restored from token store and refreshed')
+        return True
+
+    def _clear_tokens(self):
+        self._cancel_refresh_task()
+        self._session_token = None
+        self._refresh_token = None
+        self._token_refreshed_at = None
+        self._logged_in.clear()
+
+    async def get_session_token(self) -> str:
+        """Get valid session token for authenticated requests
+
+        The session token is returned immediately unless it's expired
+        (background refresh is disabled or failed), then it's refreshed first.
+        If the session token is being refreshed, this will wait for it.
+
+        Raises
+        -------
+        NotLoggedIn
+            You are not logged in
+        """
+        if not self._logged_in.is_set():
+            raise NotLoggedIn('You are not logged in')
+
+        if self._token_age() >= SESSION_TOKEN_LIFETIME or self._auth_lock.locked():
+            async with self._auth_lock:
+                if not self._logged_in.is_set():
+                    raise NotLoggedIn('You are not logged in')
+                elif self._token_age() >= SESSION_TOKEN_LIFETIME:
+                    await self._refresh_session()
+        return self._session_token
+
     async def login(self, *args, **kwargs):
         """Login to MangaDex
 
@@ -41,8 +295,12 @@ class Client:
 
         Note
         -----
-        If already logged in, it will refresh the session using "refresh token" and
+        If already logged in, nothing is requested unless the session token is
+        about to expire, then the session is refreshed using "refresh token" and
         if failed to refresh the session, password and username will be used for log in.
+
+        If ``token_store`` is given, stored tokens of the account are used
+        (and refreshed if needed) instead of logging in.
         
         Parameters
         -----------
@@ -60,25 +318,50 @@ class Client:
         """
         async with self._auth_lock:
             if self._logged_in.is_set():
-                # Check if current session token is valid
-                if await self._http.check_token(self._session_token):
+                # Session token is still fresh
+                if not self._is_token_stale():
+                    return
+
+                try:
+                    await self._refresh_session()
+                    return
+                except MangaDexException as e:
+                    log.debug('Failed to refresh session, logging in again (%r)' % e)
 
-                    # If not valid, refresh it
-                    result = await self._http.refresh_token(self._refresh_token)
-                    self._session_token = result.session_token
-                    self._refresh_token = result.refresh_token
+            if self._token_store is not None:
+                self._token_name = self._get_token_name(*args, **kwargs)
+                if self._token_name is not None and await self._restore_session():
                     return
 
             # Log in
             result = await self._http.login(*args, **kwargs)
 
-            # Set session and refresh token
-            self._session_token = result.session_token
-            self._refresh_token = result.refresh_token
-
-            # We are logged in
-            self._logged_in.set()
+            # Set session and refresh token, we are logged in
+            self._set_tokens(result)
     
+    def create_session_pool(
+        self,
+        accounts: List[dict],
+        requests_per_minute: int = 300
+    ) -> SessionPool:
+        """Create pool of MangaDex accounts for concurrent authenticated requests
+
+        The pool share the same connection pool with this client,
+        call :meth:`SessionPool.login()` to login all accounts.
+
+        Parameters
+        -----------
+        accounts: List[:class:`dict`]
+            Credentials of each account, same parameters as :meth:`Client.login()`.
+        requests_per_minute: :class:`int`
+            Rate budget of each account.
+
+        Returns
+        --------
+        :class:`SessionPool`
+        """
+        return SessionPool(self._http, accounts, requests_per_minute)
+
     async def logout(self):
         """Logout from MangaDex
         
@@ -92,10 +375,11 @@ class Client:
         async with self._auth_lock:
             if not self._logged_in.is_set():
                 raise NotLoggedIn('You are not logged in')
+            self._cancel_refresh_task()
             await self._http.logout(self._session_token)
-            self._session_token = None
-            self._refresh_token = None
-            self._logged_in.clear()
+            self._clear_tokens()
+            if self._token_store is not None and self._token_name is not None:
+                self._token_store.delete(self._token_name)
 
     def search_manga(
         self,
@@ -125,12 +409,16 @@ class Client:
         updated_at_since: Union[datetime, str] = None,
         order: MangaListOrder = None,
         includes: List[Relationship] = None,
+        prefetch: int = 0,
     ):
         """Search manga
         
         Parameters
         -----------
-        
+        prefetch: :class:`int`
+            Number of pages (100 manga each) fetched concurrently ahead of the consumer
+            after the first page is fetched, ``0`` to fetch one page at a time.
+            Manga are still yielded in order.
 
         Returns
         --------
@@ -160,5 +448,157 @@ class Client:
             created_at_since=created_at_since,
             updated_at_since=updated_at_since,
             order=order,
-            includes=includes
-        )
\ No newline at end of file
+            includes=includes,
+            prefetch=prefetch
+        )
+
+    def search_manga_sharded(
+        self,
+        since: datetime = None,
+        until: datetime = None,
+        shard_size: int = RESULT_LIMIT_MANGA,
+        concurrency: int = 4,
+        prefetch: int = 0,
+        **kwargs
+    ):
+        """Search manga past the 10,000 results limit
+
+        The search is splitted into time windows by manga creation time,
+        each of them has less than ``shard_size`` results and they are crawled concurrently.
+
+        Parameters
+        -----------
+        since: Optional[:class:`datetime`]
+            Only manga created at or after this time. (default to all manga)
+        until: Optional[:class:`datetime`]
+            Only manga created before this time. (default to now)
+        shard_size: :class:`int`
+            Maximum results for each time window, cannot be more than 10,000.
+        concurrency: :class:`int`
+            Maximum time windows crawled concurrently.
+        prefetch: :class:`int`
+            Prefetched pages for each time window, see :meth:`Client.search_manga()`.
+        **kwargs
+            Same filters as :meth:`Client.search_manga()`,
+            except ``limit``, ``created_at_since``, ``order`` and ``prefetch``.
+
+        Returns
+        --------
+        :class:`ShardedMangaIterator`
+        """
+        for key in ('limit', 'created_at_since', 'order', 'prefetch'):
+            if key in kwargs:
+                raise ValueError('%s cannot be used in sharded search' % key)
+
+        return ShardedMangaIterator(
+            search=functools.partial(self.search_manga, **kwargs),
+            since=since,
+            until=until,
+            shard_size=shard_size,
+            concurrency=concurrency,
+            prefetch=prefetch
+        )
+
+    def watch_updates(
+        self,
+        watermark: Watermark,
+        name: str = 'default',
+        since: datetime = None,
+        prefetch: int = 0,
+        poll_interval: float = None,
+        **kwargs
+    ):
+        """Iterate manga updated since the last run (delta sync)
+
+        The latest processed ``updatedAt`` is persisted to ``watermark``
+        after each page, so the next run only fetch manga updated after that.
+
+        Parameters
+        -----------
+        watermark: :class:`Watermark`
+            Watermark storage, use :class:`FileWatermark` or :class:`SQLiteWatermark`.
+        name: :class:`str`
+            Name of the feed in watermark storage.
+        since: Optional[:class:`datetime`]
+            Fetch manga updated since this time if there is no watermark yet.
+            (default to all manga)
+        prefetch: :class:`int`
+            Prefetched pages, see :meth:`Client.search_manga()`.
+        poll_interval: Optional[:class:`float`]
+            If given, keep polling for updates every ``poll_interval`` seconds
+            instead of stopping after the latest update.
+        **kwargs
+            Same filters as :meth:`Client.search_manga()`,
+            except ``limit``, ``updated_at_since``, ``order`` and ``prefetch``.
+
+        Returns
+        --------
+        :class:`UpdatesIterator`
+        """
+        for key in ('limit', 'updated_at_since', 'order', 'prefetch'):
+            if key in kwargs:
+                raise ValueError('%s cannot be used in updates feed' % key)
+
+        return UpdatesIterator(
+            search=functools.partial(self.search_manga, **kwargs),
+            watermark=watermark,
+            name=name,
+            since=since,
+            prefetch=prefetch,
+            poll_interval=poll_interval
+        )
+
+    async def get_manga_bulk(self, ids: List[str], concurrency: int = 4) -> MangaBulkResult:
+        """Get many manga by IDs
+
+        IDs are deduplicated and fetched in chunks of 100 concurrently,
+        all content ratings are included.
+
+        Parameters
+        -----------
+        ids: List[:class:`str`]
+            Manga IDs.
+        concurrency: :class:`int`
+            Maximum chunks fetched concurrently.
+
+        Returns
+        --------
+        :class:`MangaBulkResult`
+            Manga keyed by ID in input order, with missing IDs.
+
+        Raises
+        -------
+        HTTPException
+        """
+        if not isinstance(ids, (list, tuple)):
+            raise ValueError('ids must be list or tuple')
+        if concurrency <= 0:
+            raise ValueError('concurrency must be higher than 0')
+
+        # Remove duplicate IDs but keep the order
+        ids = list(dict.fromkeys(ids))
+        chunks = [ids[pos:pos + 100] for pos in range(0, len(ids), 100)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(chunk):
+            async with semaphore:
+                return await self.search_manga(
+                    limit=len(chunk),
+                    manga_ids=chunk,
+                    content_rating=list(ContentRating)
+                ).flatten()
+
+        found = {}
+        for mangas in await asyncio.gather(*[fetch(chunk) for chunk in chunks]):
+            for manga in mangas:
+                found[manga.id] = manga
+
+        result = {}
+        missing = []
+        for _id in ids:
+            manga = found.get(_id)
+            if manga is None:
+                missing.append(_id)
+            else:
+                result[_id] = manga
+        return MangaBulkResult(result, missing)
\ No newline at end of file
@@ -0,0 +1,91 @@
+from typing import Dict, Hashable, Optional, Tuple, Union
+from .types.manga import Relationship
+
+__all__ = (
+    'Entity', 'EntityCache'
+)
+
+# Entities that belong to a single manga, they are never shared
+# and caching them would only grow the cache
+_NOT_CACHED = frozenset((Relationship.COVER_ART,))
+
+def _get_relationship(_type: str) -> Union[Relationship, str]:
+    try:
+        return Relationship(_type)
+    except ValueError:
+        # Unknown relationship type, use the raw type
+        return _type
+
+class Entity:
+    """Related entity (author, artist, cover art, tag, ...) of manga
+
+    ``attributes`` is ``None`` if the entity is not included
+    in the request (see ``includes`` in :meth:`Client.search_manga()`).
+    """
+    __slots__ = ('id', 'type', 'attributes')
+
+    def __init__(self, _type: Union[Relationship, str], _id: str, attributes: dict = None) -> None:
+        self.id = _id
+        self.type = _type
+        self.attributes = attributes
+
+    def get(self, key: str, default=None):
+        """Get attribute of the entity"""
+        if self.attributes is None:
+            return default
+        return self.attributes.get(key, default)
+
+    def __repr__(self) -> str:
+        return '<Entity type="%s" id="%s">' % (
+            getattr(self.type, 'value', self.type),
+            self.id
+        )
+
+class EntityCache:
+    """Identity map for related entities, keyed by ``(Relationship, id)``
+
+    The same author, artist or tag returned in many manga
+    (across pages and requests) is stored once and shared.
+    Cover arts belong to a single manga, so they are not cached.
+    """
+    def __init__(self) -> None:
+        self._entities: Dict[Tuple[Hashable, str], Entity] = {}
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, key: Tuple[Union[Relationship, str], str]) -> bool:
+        return key in self._entities
+
+    def get(self, _type: Union[Relationship, str], _id: str) -> Optional[Entity]:
+        """Get cached entity, return ``None`` if it's not cached"""
+        if isinstance(_type, str):
+            _type = _get_relationship(_type)
+        return self._entities.get((_type, _id))
+
+    def intern(self, _type: Union[Relationship, str], _id: str, attributes: dict = None) -> Entity:
+        """Get shared entity for given type and id, create it if it's not cached.
+
+        If ``attributes`` is given, cached entity attributes are updated.
+        Cover arts are not cached, a new entity is returned.
+        """
+        if isinstance(_type, str):
+            _type = _get_relationship(_type)
+        if _type in _NOT_CACHED:
+            return Entity(_type, _id, attributes)
+        key = (_type, _id)
+        entity = self._entities.get(key)
+        if entity is None:
+            entity = Entity(_type, _id, attributes)
+            self._entities[key] = entity
+        elif attributes is not None:
+            entity.attributes = attributes
+        return entity
+
+    def intern_data(self, data: dict) -> Entity:
+        """Intern entity from raw data (relationship object)"""
+        return self.intern(data.get('type'), data.get('id'), data.get('attributes'))
+
+    def clear(self) -> None:
+        """Remove all cached entities"""
+        self._entities.clear()
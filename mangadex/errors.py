@@ -27,4 +27,18 @@ class ServerError(HTTPException):
 
 class Forbidden(HTTPException):
     """Error happened when you don't have permission to do that"""
-    pass
\ No newline at end of file
+    pass
+
+class RetryError(MangaDexException):
+    """Request is failing after all attempts or the deadline is exceeded"""
+    def __init__(self, message: str, last_exception: BaseException=None) -> None:
+        self.last_exception = last_exception
+        super().__init__(message)
+
+class CircuitBreakerOpen(MangaDexException):
+    """Circuit breaker for the route is open, requests are failing fast"""
+    pass
+
+class ReplayError(MangaDexException):
+    """There is no recorded response for the request in :class:`ReplayTransport` cassette"""
+    pass
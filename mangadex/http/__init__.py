@@ -1 +1,6 @@
-from .http import *
\ No newline at end of file
+from .http import *
+from .cache import *
+from .codec import *
+from .retry import *
+from .metrics import *
+from .transport import *
\ No newline at end of file
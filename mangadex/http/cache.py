@@ -0,0 +1,128 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Hashable, Optional, Type
+from ..routes.base import BaseRoute, GET, RequireLogin
+
+__all__ = (
+    'ResponseCache', 'make_request_key',
+    'is_idempotent_route'
+)
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_normalize(i) for i in value)
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    return value
+
+def is_idempotent_route(route: BaseRoute) -> bool:
+    """Check if given route is ``GET`` route that doesn't require authentication"""
+    return isinstance(route, GET) and not isinstance(route, RequireLogin)
+
+def make_request_key(params: dict) -> Hashable:
+    """Make hashable key from :meth:`BaseRoute.build_request()` output
+
+    The key is made from method, url and normalized query params.
+    """
+    return (
+        params['method'],
+        params['url'],
+        _normalize(params.get('params') or {})
+    )
+
+class ResponseCache:
+    """LRU response cache with TTL for idempotent routes.
+
+    Only ``GET`` routes that doesn't require authentication are cached,
+    see :meth:`ResponseCache.is_cacheable()`.
+
+    Parameters
+    -----------
+    maxsize: :class:`int`
+        Maximum cached responses, least recently used response
+        will be evicted if cache is full.
+    ttl: :class:`float`
+        Default time-to-live (in seconds) for cached responses.
+    route_ttl: Dict[Type[:class:`BaseRoute`], :class:`float`]
+        Time-to-live (in seconds) for each route class,
+        if route class is not listed here ``ttl`` will be used.
+    """
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60,
+        route_ttl: Dict[Type[BaseRoute], float] = None
+    ) -> None:
+        if not isinstance(maxsize, int):
+            raise ValueError('maxsize must be int')
+        elif maxsize <= 0:
+            raise ValueError('maxsize must be higher than 0')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.route_ttl = route_ttl or {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> (expire time, value)
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def is_cacheable(self, route: BaseRoute) -> bool:
+        """Check if response of given route can be cached"""
+        return is_idempotent_route(route)
+
+    def get_ttl(self, route: BaseRoute) -> float:
+        """Get time-to-live for given route"""
+        return self.route_ttl.get(type(route), self.ttl)
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        """Get cached response, return ``None`` if not cached or expired"""
+        try:
+            expire, value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        if expire <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: dict, ttl: float = None) -> None:
+        """Store response to the cache"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Return cache statistics"""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
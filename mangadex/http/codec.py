@@ -0,0 +1,82 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__all__ = (
+    'JSONCodec', 'StdlibJSONCodec', 'OrjsonCodec',
+    'UjsonCodec', 'get_default_codec'
+)
+
+class JSONCodec:
+    """Base class for JSON codec used for request and response bodies.
+
+    Subclass this to use your own JSON library.
+    """
+    name = None
+
+    def dumps(self, obj) -> str:
+        """Serialize ``obj`` to JSON string"""
+        raise NotImplementedError
+
+    def loads(self, data: bytes):
+        """Deserialize raw bytes of JSON document"""
+        raise NotImplementedError
+
+class StdlibJSONCodec(JSONCodec):
+    """JSON codec using python built-in :mod:`json`"""
+    name = 'json'
+
+    def dumps(self, obj) -> str:
+        return json.dumps(obj)
+
+    def loads(self, data: bytes):
+        # json.loads() accept bytes and detect the encoding by itself
+        return json.loads(data)
+
+class OrjsonCodec(JSONCodec):
+    """JSON codec using `orjson <https://github.com/ijl/orjson>`_"""
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError('orjson is not installed')
+
+    def dumps(self, obj) -> str:
+        # orjson.dumps() return bytes
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, data: bytes):
+        return orjson.loads(data)
+
+class UjsonCodec(JSONCodec):
+    """JSON codec using `ujson <https://github.com/ultrajson/ultrajson>`_"""
+    name = 'ujson'
+
+    def __init__(self) -> None:
+        if ujson is None:
+            raise ImportError('ujson is not installed')
+
+    def dumps(self, obj) -> str:
+        return ujson.dumps(obj)
+
+    def loads(self, data: bytes):
+        return ujson.loads(data)
+
+def get_default_codec() -> JSONCodec:
+    """Get fastest available JSON codec
+
+    orjson is preferred, then ujson, and fallback to python built-in :mod:`json`
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    elif ujson is not None:
+        return UjsonCodec()
+    return StdlibJSONCodec()
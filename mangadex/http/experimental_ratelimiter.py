@@ -1,18 +1,29 @@
-# This is experimental ratelimit handler.
+# Ratelimit handler.
 # Handle ratelimit properly without constantly checking if we are being rate-limited or not.
-# Normal users shouldn't use this, cause this is experimental.
+# This is used by HTTPClient when ratelimit mode is enabled.
 
 import asyncio
+import collections
 import threading
 import logging
+import weakref
+from typing import Optional
 
 log = logging.getLogger(__name__)
 
-# For caching limiters
-_stored_rate_limiters = {}
+# For caching limiters, per event loop and keyed by method and path template.
+# Rate limiters hold timers and futures of the event loop using them,
+# so they cannot be shared between event loops (and threads).
+# event loop -> {name: RateLimiter}
+_stored_rate_limiters = weakref.WeakKeyDictionary()
 
-# Global limit requests
-_GLOBAL_LIMIT = 300
+# Global limit requests (per second)
+# According to https://api.mangadex.org/docs.html#section/Rate-limits
+# 5 requests per second per IP address
+_GLOBAL_LIMIT = 5
+
+# Name for global rate limiter in _stored_rate_limiters
+_GLOBAL_NAME = '*'
 
 # for get_rate_limiter()
 _lock = threading.Lock()
@@ -23,7 +34,7 @@ class _Path:
         method: str,
         path: str,
         requests_per_time: int,
-        reset_time_in_minutes: int=60
+        reset_time_in_minutes: float=60
     ) -> None:
         self.METHOD = method
         self.PATH = path
@@ -59,139 +70,279 @@ _RESTRICTED_ENDPOINTS_LIMIT = [
     _Path('POST', '/upload/begin', 30)
 ]
 
-class RateLimiter(asyncio.Semaphore):
+_GLOBAL_PATH = _Path(_GLOBAL_NAME, _GLOBAL_NAME, _GLOBAL_LIMIT, 1 / 60)
+
+class _TrieNode:
+    __slots__ = ('children', 'param', 'paths')
+
+    def __init__(self) -> None:
+        # Literal path segment -> _TrieNode
+        self.children = {}
+        # Node for templated segment ("{id}", "{code}", ...)
+        self.param = None
+        # Method -> _Path, for paths ending at this node
+        self.paths = {}
+
+def _split_path(path: str):
+    return [i for i in path.split('/') if i]
+
+def _build_trie(paths) -> _TrieNode:
+    root = _TrieNode()
+    for _path in paths:
+        node = root
+        for segment in _split_path(_path.PATH):
+            if segment.startswith('{') and segment.endswith('}'):
+                if node.param is None:
+                    node.param = _TrieNode()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _TrieNode())
+        node.paths[_path.METHOD] = _path
+    return root
+
+def _match(node: _TrieNode, segments, pos: int, method: str) -> Optional[_Path]:
+    if pos == len(segments):
+        return node.paths.get(method)
+
+    # Literal segments take precedence over templated ones
+    # ("/account/activate/resend" over "/account/activate/{code}")
+    child = node.children.get(segments[pos])
+    if child is not None:
+        result = _match(child, segments, pos + 1, method)
+        if result is not None:
+            return result
+
+    if node.param is not None:
+        return _match(node.param, segments, pos + 1, method)
+    return None
+
+# Precompiled path templates of _RESTRICTED_ENDPOINTS_LIMIT
+_RESTRICTED_ENDPOINTS_TRIE = _build_trie(_RESTRICTED_ENDPOINTS_LIMIT)
+
+def find_restricted_endpoint(method: str, path: str) -> Optional[_Path]:
+    """Resolve concrete method and path to its restricted endpoint
+    (exact match against path templates), return ``None`` if it's not restricted."""
+    return _match(_RESTRICTED_ENDPOINTS_TRIE, _split_path(path), 0, method)
+
+class RateLimiter:
     """A built-in ratelimiter for MangaDex API
     without constantly checking if we are being rate limited or not.
 
-    This class implement :class:`asyncio.Semaphore` and thread-safe.
+    Every request takes one from the budget of current window, the window
+    starts at the first request and the budget is refilled (in constant time)
+    when the window is over.
+
+    All operations must be called from the event loop thread,
+    there is no lock because nothing is awaited between checking
+    and taking the budget.
     """
     def __init__(self, path: _Path):
-        super().__init__(path.MAX_REQUESTS)
-        self._countdown_fut = None
-        self._delay = None
         self._path = path
-        self._requests_queued = 0
+        self._value = path.MAX_REQUESTS
+        self._waiters = collections.deque()
+
+        # Event loop time when the budget is refilled,
+        # ``None`` if the window is not started yet
+        self._reset_at = None
+        self._reset_handle = None
+
+        # Event loop owning the timer and waiters
+        self._loop = None
+
         self.method = path.METHOD
         self.path = path.PATH
         self.requests_limit = path.MAX_REQUESTS
         self.reset_time = path.RESET_TIME * 60 # Convert to seconds from minutes
-        self.resetted = asyncio.Event()
-        # We are not sending any requests
-        self.resetted.set()
-
-        # Thread-safe ratelimiter operations
-        self._lock = asyncio.Lock()
-
-    async def _countdown_reset_time(self, delay):
-        await asyncio.sleep(delay)
-        await self.reset()
-        self.resetted.set()
-        log.info('Rate limit for "%s %s" is now resetted' % (self.method, self.path))
-
-    async def _wait(self, fut):
-        try:
-            await fut
-        except:
-            # See the similar code in Queue.get.
-            fut.cancel()
-            if self._value > 0 and not fut.cancelled():
-                self._wake_up_next()
-            raise
-
-    def _create_waiter(self):
-        fut = self._loop.create_future()
-        self._waiters.append(fut)
-        return fut
 
-    async def acquire(self) -> bool:
-        print(self._value)
-        while self._value <= 0:
-            async with self._lock:
-                self._requests_queued += 1
-            waiter = self._create_waiter()
-            log.info('Rate limit is triggered for "%s %s" (requests queued: %s)' % (
-                self.method,
-                self.path,
-                self._requests_queued
-            ))
-            await self._wait(waiter)
+    @classmethod
+    def per_minute(cls, name: str, requests: int) -> "RateLimiter":
+        """Create rate limiter that allows ``requests`` per minute,
+        for budgets that are not tied to an endpoint (ex: per account)
 
-        async with self._lock:
-            self._value -= 1
-            if self.resetted.is_set():
-                delay = self._delay or self.reset_time
-                self._start_countdown(delay)
-        return True
+        Parameters
+        -----------
+        name: :class:`str`
+            Name of the rate limiter, used as :attr:`RateLimiter.path`.
+        requests: :class:`int`
+            Requests allowed in every minute.
+        """
+        return cls(_Path('*', name, requests, 1))
 
-    def _start_countdown(self, delay):
-        # Begin the countdown !!
-        log.debug('Starting reset time rate limiter (%ss) countdown' % delay)
-        self.resetted.clear()
-        self._countdown_fut = asyncio.ensure_future(self._countdown_reset_time(delay))
+    @property
+    def remaining(self) -> int:
+        """Requests remaining before the rate limiter is reset"""
+        if self._reset_at is not None and asyncio.get_running_loop().time() >= self._reset_at:
+            return self.requests_limit
+        return max(self._value, 0)
 
-    async def reboot_rate_limiter(self, requests_remaining, retry_after):
-        async with self._lock:
-            log.debug('Rate limiter for "%s %s" got reboot with requests_remaining = "%s", retry_after = "%s"' % (
-                self.method,
-                self.path,
-                requests_remaining,
-                retry_after
-            ))
-            if self._countdown_fut is not None:
+    @property
+    def requests_queued(self) -> int:
+        return len(self._waiters)
 
-                # Try to cancel the countdown future
-                self._countdown_fut.cancel()
-                try:
-                    await self._countdown_fut
-                except:
-                    pass
-                self._countdown_fut = None
+    def locked(self) -> bool:
+        """Return ``True`` if :meth:`acquire()` would wait"""
+        return self.remaining <= 0 or bool(self._waiters)
+
+    def _refill(self, now: float):
+        # The window is over but the timer is not fired yet
+        if self._reset_at is not None and now >= self._reset_at:
+            if self._reset_handle is not None:
+                self._reset_handle.cancel()
+            self._on_reset()
 
-            # Reboot the rate limiter
-            self._value = requests_remaining
-            self._reset_without_notify(requests_remaining)
-            self._start_countdown(retry_after)
+    def _schedule_reset(self, loop: asyncio.AbstractEventLoop, reset_at: float):
+        if self._reset_handle is not None:
+            self._reset_handle.cancel()
+        self._reset_at = reset_at
+        self._reset_handle = loop.call_at(reset_at, self._on_reset)
 
-    def _reset_without_notify(self, limit):
-        while self._value != limit:
-            self._value += 1
+    def _on_reset(self):
+        self._reset_handle = None
+        self._value = self.requests_limit
+        self._reset_at = None
+        log.debug('Rate limit for "%s %s" is now resetted' % (self.method, self.path))
+        self._wake_up_next()
 
-    def _wake_up_all(self):
+    def _wake_up_next(self):
+        # Only the first waiter is woken up, it takes the budget in acquire()
+        # and wake up the next one if there is budget left
         while self._waiters:
             waiter = self._waiters.popleft()
             if not waiter.done():
                 waiter.set_result(None)
+                return
 
-    def _reset(self):
-        limit = self.requests_limit
-        while self._value != limit:
-            self._value += 1
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop):
+        # The rate limiter is used in another event loop (ex: previous asyncio.run()
+        # is finished), the timer and waiters of old event loop are dropped and
+        # the timer is rearmed in acquire() if needed.
+        # Event loop time is time.monotonic() by default, so the window is kept.
+        if self._loop is loop:
+            return
+        if self._reset_handle is not None:
+            self._reset_handle.cancel()
+            self._reset_handle = None
+        self._waiters.clear()
+        self._loop = loop
+
+    async def acquire(self) -> bool:
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+        self._refill(loop.time())
+
+        # Requests are served in FIFO order, new requests are queued
+        # behind the waiters
+        if self._value <= 0 or self._waiters:
+            if self._value <= 0 and self._reset_handle is None and self._reset_at is not None:
+                self._schedule_reset(loop, self._reset_at)
+            log.debug('Rate limit is triggered for "%s %s" (requests queued: %s)' % (
+                self.method,
+                self.path,
+                len(self._waiters) + 1
+            ))
+
+            first = True
+            while True:
+                waiter = loop.create_future()
+                if first:
+                    self._waiters.append(waiter)
+                    first = False
+                else:
+                    # Woken up but the budget is taken, keep the position
+                    self._waiters.appendleft(waiter)
+                try:
+                    await waiter
+                except BaseException:
+                    waiter.cancel()
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        # Already woken up, pass the turn to next waiter
+                        if self._value > 0:
+                            self._wake_up_next()
+                    raise
+
+                self._refill(loop.time())
+                if self._value > 0:
+                    break
+
+        self._value -= 1
+        if self._reset_at is None:
+            # Begin the countdown !!
+            self._reset_at = loop.time() + self.reset_time
+            self._reset_handle = None
+
+        # Waiters are woken up by the timer when the budget is exhausted
+        if self._value <= 0 and self._reset_handle is None:
+            self._schedule_reset(loop, self._reset_at)
+        elif self._value > 0:
+            self._wake_up_next()
+        return True
+
+    async def reboot_rate_limiter(self, requests_remaining, retry_after):
+        """Resync the rate limiter with MangaDex rate limit headers"""
+        log.debug('Rate limiter for "%s %s" got reboot with requests_remaining = "%s", retry_after = "%s"' % (
+            self.method,
+            self.path,
+            requests_remaining,
+            retry_after
+        ))
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+        self._value = requests_remaining
+        self._schedule_reset(loop, loop.time() + retry_after)
+        if requests_remaining > 0:
             self._wake_up_next()
 
     async def reset(self) -> None:
-        async with self._lock:
-            self._reset()
+        if self._reset_handle is not None:
+            self._reset_handle.cancel()
+        self._on_reset()
 
     async def release(self) -> None:
-        async with self._lock:
-            if self._requests_queued:
-                self._requests_queued -= 1
+        # Budget is only refilled when the window is over
+        pass
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
         await self.release()
 
-def get_rate_limiter(method: str, path: str) -> RateLimiter:
-    name = f'{method} {path}'
+def get_rate_limiter(method: str, path: str) -> Optional[RateLimiter]:
+    """Get restricted endpoint rate limiter for given method and path
+
+    Return ``None`` if given method and path is not restricted endpoint,
+    use :func:`get_global_rate_limiter()` for that.
+
+    Rate limiters are shared by all clients in the running event loop.
+    """
+    _path = find_restricted_endpoint(method, path)
+    if _path is None:
+        return None
+
+    # Concrete paths of the same template share one rate limiter
+    name = f'{_path.METHOD} {_path.PATH}'
+    return _get_stored_rate_limiter(name, _path)
+
+def get_global_rate_limiter() -> RateLimiter:
+    """Get rate limiter for global limit requests, shared by all endpoints
+
+    Rate limiters are shared by all clients in the running event loop.
+    """
+    return _get_stored_rate_limiter(_GLOBAL_NAME, _GLOBAL_PATH)
+
+def _get_stored_rate_limiter(name: str, path: _Path) -> RateLimiter:
+    # Must be called from running event loop
+    loop = asyncio.get_running_loop()
     with _lock:
-        rate_limiter = _stored_rate_limiters.get(name)
+        rate_limiters = _stored_rate_limiters.get(loop)
+        if rate_limiters is None:
+            rate_limiters = {}
+            _stored_rate_limiters[loop] = rate_limiters
+
+        rate_limiter = rate_limiters.get(name)
         if rate_limiter is None:
-            # Create Restricted Ratelimiter if given method and path is endpoints restricted.
-            for _path in _RESTRICTED_ENDPOINTS_LIMIT:
-                if _path.METHOD == method and path.startswith(_path.PATH):
-                    rate_limiter = RateLimiter(_path)
-            
-            # Create global rate limiter, if given method and path is not endpoint restricted.
-            if rate_limiter is None:
-                rate_limiter = RateLimiter(_Path(method, path, _GLOBAL_LIMIT, ))
-            _stored_rate_limiters[name] = rate_limiter
-    return rate_limiter
\ No newline at end of file
+            rate_limiter = RateLimiter(path)
+            rate_limiters[name] = rate_limiter
+    return rate_limiter
@@ -1,85 +1,425 @@
 import asyncio
-import json
 import logging
 import aiohttp
 import time
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
 from .result import *
+from .cache import ResponseCache, make_request_key, is_idempotent_route
+from .codec import JSONCodec, get_default_codec
+from .retry import RetryPolicy
+from .metrics import RequestHooks
+from .transport import Transport, TransportResponse, AiohttpTransport
+from .experimental_ratelimiter import get_rate_limiter, get_global_rate_limiter
 from ..routes import *
-from ..errors import Forbidden, HTTPException, ServerError
+from ..entity import EntityCache
+from ..errors import Forbidden, HTTPException, ServerError, RetryError, CircuitBreakerOpen
 
 __all__ = (
     'HTTPClient',
 )
 
-json_dumper = json.dumps
-
 log = logging.getLogger(__name__)
 
+# Same as aiohttp default timeouts (in seconds)
+DEFAULT_TOTAL_TIMEOUT = 300
+DEFAULT_CONNECT_TIMEOUT = 30
+
 class HTTPClient:
-    def __init__(self, *, loop = None) -> None:
+    def __init__(
+        self,
+        *,
+        loop = None,
+        ratelimit: bool = False,
+        cache: ResponseCache = None,
+        coalesce: bool = False,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 15,
+        dns_cache_ttl: Optional[int] = 10,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        json_codec: JSONCodec = None,
+        retry_policy: RetryPolicy = None,
+        hooks: Iterable[RequestHooks] = None,
+        transport: Transport = None,
+        base_url: Optional[str] = None,
+        entities: EntityCache = None
+    ) -> None:
         self.loop = loop or asyncio.get_event_loop()
+        self.json_codec = json_codec or get_default_codec()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hooks = list(hooks or [])
+        self.transport = transport or AiohttpTransport()
+        self.base_url = base_url
+        self.entities = entities if entities is not None else EntityCache()
+        self.ratelimit = ratelimit
+        self.cache = cache
+        self.coalesce = coalesce
         self._session = None
+        self._sessions_created = 0
+
+        # Connection pool options
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # In-flight identical requests (for coalescing)
+        # request key -> asyncio.Task
+        self._inflight = {}
 
     def _create_session(self):
-        self._session = aiohttp.ClientSession(json_serialize=json_dumper, loop=self.loop)
+        connector = aiohttp.TCPConnector(
+            limit=self.connection_limit,
+            limit_per_host=self.connection_limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=self.dns_cache_ttl is not None,
+            ttl_dns_cache=self.dns_cache_ttl
+        )
+        # Keep aiohttp default timeouts (total and sock_connect)
+        # unless they're given
+        timeout = aiohttp.ClientTimeout(
+            total=DEFAULT_TOTAL_TIMEOUT,
+            sock_connect=self.connect_timeout if self.connect_timeout is not None else DEFAULT_CONNECT_TIMEOUT,
+            sock_read=self.read_timeout
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            json_serialize=self.json_codec.dumps,
+            loop=self.loop
+        )
+        self._sessions_created += 1
 
     def recreate_session(self):
-        if not self._session:
+        # The session (and its connection pool) is reused for the whole lifetime
+        # of HTTPClient, it's only created if there is no session or
+        # the session is closed by close_session()
+        if not self.transport.requires_session:
+            return
+        elif self._session is None:
             self._create_session()
-        if self._session.closed:
+        elif self._session.closed:
+            log.debug('Session is closed, creating new session')
             self._create_session()
 
+    def pool_stats(self) -> dict:
+        """Return connection pool statistics"""
+        stats = {
+            'limit': self.connection_limit,
+            'limit_per_host': self.connection_limit_per_host,
+            'acquired': 0,
+            'idle': 0,
+            'sessions_created': self._sessions_created
+        }
+        if self._session is None or self._session.closed:
+            return stats
+
+        connector = self._session.connector
+        stats['acquired'] = len(getattr(connector, '_acquired', ()))
+        stats['idle'] = sum(len(i) for i in getattr(connector, '_conns', {}).values())
+        return stats
+
     async def close_session(self):
         if self._session:
             await self._session.close()
+        await self.transport.close()
+
+    def _get_rate_limiters(self, params):
+        # Global rate limiter must be acquired first, restricted endpoints
+        # (if any) is acquired after that.
+        limiters = [get_global_rate_limiter()]
+        path = urlsplit(params['url']).path
+        limiter = get_rate_limiter(params['method'], path)
+        if limiter is not None:
+            limiters.append(limiter)
+        return limiters
+
+    async def _acquire_rate_limiters(self, limiters):
+        for limiter in limiters:
+            await limiter.acquire()
+
+    async def _release_rate_limiters(self, limiters):
+        for limiter in limiters:
+            await limiter.release()
+
+    async def _update_rate_limiter(self, limiter, headers) -> bool:
+        # Resync the rate limiter with MangaDex rate limit headers,
+        # return True if the rate limiter is resynced
+        remaining = headers.get('x-ratelimit-remaining')
+        retry_after = headers.get('x-ratelimit-retry-after')
+        if remaining is None or retry_after is None:
+            return False
+
+        try:
+            remaining = int(remaining)
+            retry_after = max(float(retry_after) - time.time(), 0)
+        except ValueError:
+            log.debug('Invalid rate limit headers (remaining = "%s", retry_after = "%s")' % (
+                remaining,
+                retry_after
+            ))
+            return False
+
+        await limiter.reboot_rate_limiter(remaining, retry_after)
+        return True
+
+    def add_hook(self, hook: RequestHooks):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: RequestHooks):
+        self.hooks.remove(hook)
+
+    def _emit(self, name, *args):
+        for hook in self.hooks:
+            try:
+                getattr(hook, name)(*args)
+            except Exception:
+                log.exception('Hook %r failed on %s' % (hook, name))
 
     async def request(self, route: BaseRoute):
-        self.recreate_session()
         params = route.build_request()
+        if self.base_url is not None:
+            params['url'] = self.base_url + params['url'][len(route.BASE_URL):]
+
+        cache = self.cache
+        cacheable = cache is not None and cache.is_cacheable(route)
+        coalesce = self.coalesce and is_idempotent_route(route)
+        if not cacheable and not coalesce:
+            return await self._request(route, params)
+
+        key = make_request_key(params)
+        if cacheable:
+            data = cache.get(key)
+            if data is not None:
+                return data
+
+        if coalesce:
+            data = await self._request_coalesced(key, route, params)
+        else:
+            data = await self._request(route, params)
+
+        if cacheable:
+            cache.set(key, data, cache.get_ttl(route))
+        return data
+
+    async def _request_coalesced(self, key, route: BaseRoute, params: dict):
+        # Concurrent identical requests share one in-flight task and
+        # all of them receive the same decoded payload.
+        # The task is shielded, so cancelling one of the callers
+        # doesn't cancel the request for the others.
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(route, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._request_coalesced_done(key, t))
+        else:
+            log.debug('Coalescing request "%s %s"' % (params['method'], params['url']))
+        return await asyncio.shield(task)
+
+    def _request_coalesced_done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Mark the exception as retrieved, in case all callers are cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def _read_error(self, resp: TransportResponse) -> dict:
+        body = resp.body
+        try:
+            data = self.json_codec.loads(body)
+        except ValueError:
+            # Not a MangaDex error response (ex: DDoS-Guard)
+            return {'status': resp.status, 'detail': body.decode('utf-8', 'replace')}
+
+        # MangaDex error response contains list of errors
+        # we only take the first one
+        errors = data.get('errors') if isinstance(data, dict) else None
+        if errors:
+            return errors[0]
+        return data
 
-        for attempt in range(5):
+    def _get_ratelimit_delay(self, headers) -> Optional[float]:
+        # x-ratelimit-retry-after is from MangaDex and
+        # Retry-After is from DDoS-Guard
+        try:
+            if headers.get('x-ratelimit-retry-after'):
+                return max(float(headers['x-ratelimit-retry-after']) - time.time(), 0)
+            elif headers.get('Retry-After'):
+                return max(float(headers['Retry-After']), 0)
+        except ValueError:
+            pass
+        return None
+
+    async def _acquire_and_send(self, limiters, params):
+        await self._acquire_rate_limiters(limiters)
+        sent_at = time.perf_counter()
+        resp = await self.transport.send(self._session, params)
+        return resp, sent_at
+
+    def _deadline_error(self, params, error) -> RetryError:
+        return RetryError(
+            'Request "%s %s" is exceeding deadline (%ss)' % (
+                params['method'],
+                params['url'],
+                self.retry_policy.deadline
+            ),
+            error
+        )
+
+    async def _request(self, route: BaseRoute, params: dict):
+        self.recreate_session()
+        policy = self.retry_policy
+        breaker = policy.get_circuit_breaker(route)
+        limiters = self._get_rate_limiters(params) if self.ratelimit else []
+        started = time.monotonic()
+        attempt = 0
+
+        # Whether this request is the half-open trial of the circuit breaker
+        trial = breaker.check() if breaker is not None else False
+
+        while True:
+            # Delay before next attempt, if it's None
+            # exponential backoff will be used
+            delay = None
+            status = None
+            hooks = self.hooks
+
+            if hooks:
+                self._emit('on_request_start', route, attempt)
+            queued_at = sent_at = time.perf_counter()
             try:
-                async with self._session.request(**params) as resp:
-                    
-                    # We are being rate limited
-                    if resp.status == 429:
-                        
-                        # x-ratelimit-retry-after is from MangaDex and
-                        # Retry-After is from DDoS-Guard
-                        if resp.headers.get('x-ratelimit-retry-after'):
-                            delay = float(resp.headers.get('x-ratelimit-retry-after')) - time.time()
-
-                        elif resp.headers.get('Retry-After'):
-                            delay = float(resp.headers.get('Retry-After'))
-
-                        await asyncio.sleep(delay)
-                        continue
-                    
-                    # The request was successful
-                    elif resp.status == 200:
-                        return await resp.json()
-                    
-                    # Server error
-                    elif resp.status >= 500:
-                        err = await resp.json()
-                        raise ServerError(err)
-
-                    # Forbidden
-                    elif resp.status == 403:
-                        err = await resp.json()
-                        raise Forbidden(err)
-
-                    # 400 and upper.
-                    else:
-                        err = await resp.json()
-                        raise HTTPException(err)
-
-            except OSError:
-                await asyncio.sleep(1 + attempt * 2)
-                continue
-
-        # We're run out of attempts, throwing error
-        raise RuntimeError('Unknown error in HTTP handling')
+                if policy.deadline is None:
+                    resp, sent_at = await self._acquire_and_send(limiters, params)
+                else:
+                    # Waiting for rate limiters and the request itself
+                    # are bounded by the deadline too
+                    timeout = max(policy.deadline - (time.monotonic() - started), 0)
+                    try:
+                        resp, sent_at = await asyncio.wait_for(
+                            self._acquire_and_send(limiters, params),
+                            timeout
+                        )
+                    except asyncio.TimeoutError as e:
+                        if time.monotonic() - started < policy.deadline:
+                            # Timeout from the transport
+                            raise
+                        raise self._deadline_error(params, e) from e
+                status = resp.status
+
+                # The most specific rate limiter is always the last one
+                resynced = False
+                if limiters:
+                    resynced = await self._update_rate_limiter(limiters[-1], resp.headers)
+
+                # The request was successful
+                if resp.status == 200:
+                    received_at = time.perf_counter()
+                    data = self.json_codec.loads(resp.body)
+                    if hooks:
+                        self._emit(
+                            'on_response',
+                            route,
+                            status,
+                            sent_at - queued_at,
+                            received_at - sent_at,
+                            time.perf_counter() - received_at
+                        )
+                    if breaker is not None:
+                        breaker.record_success()
+                    return data
+
+                err = self._read_error(resp)
+
+                # We are being rate limited
+                if resp.status == 429:
+                    error = HTTPException(err)
+                    delay = self._get_ratelimit_delay(resp.headers)
+                    if hooks:
+                        self._emit('on_ratelimit', route, delay or 0)
+
+                    # The rate limiter has been resynced and will hold
+                    # the next attempt until the rate limit is resetted
+                    if resynced:
+                        delay = 0
+
+                # Server error
+                elif resp.status >= 500:
+                    error = ServerError(err)
+                    if breaker is not None:
+                        breaker.record_failure()
+
+                # Forbidden
+                elif resp.status == 403:
+                    error = Forbidden(err)
+
+                # 400 and upper.
+                else:
+                    error = HTTPException(err)
+
+                # The server is responding properly
+                if breaker is not None and resp.status < 500 and resp.status != 429:
+                    breaker.record_success()
+
+                if not policy.should_retry(resp.status):
+                    if hooks:
+                        self._emit('on_response', route, status, sent_at - queued_at, time.perf_counter() - sent_at, 0)
+                    raise error
+
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+                if breaker is not None:
+                    breaker.record_failure()
+            finally:
+                await self._release_rate_limiters(limiters)
+
+                # The trial is done (rate limited and cancelled trial is neither
+                # success nor failure), let the next request be the trial
+                if trial:
+                    breaker.release_trial()
+                    trial = False
+
+            if hooks:
+                self._emit('on_response', route, status, sent_at - queued_at, time.perf_counter() - sent_at, 0)
+
+            attempt += 1
+            if attempt >= policy.max_attempts:
+                # We're run out of attempts, throwing error
+                raise RetryError(
+                    'Request "%s %s" is failing after %s attempts' % (
+                        params['method'],
+                        params['url'],
+                        attempt
+                    ),
+                    error
+                ) from error
+
+            # Fail fast if the route is failing (by this or other requests)
+            if breaker is not None and breaker.state == breaker.OPEN:
+                raise CircuitBreakerOpen(
+                    'Circuit breaker for "%s" is open' % breaker.name
+                ) from error
+
+            if delay is None:
+                delay = policy.get_backoff(attempt)
+
+            if policy.deadline is not None and time.monotonic() - started + delay > policy.deadline:
+                raise self._deadline_error(params, error) from error
+
+            log.debug('Retrying request "%s %s" in %.2fs (attempt: %s, error: %r)' % (
+                params['method'],
+                params['url'],
+                delay,
+                attempt,
+                error
+            ))
+            if hooks:
+                self._emit('on_retry', route, attempt, delay, error)
+            await asyncio.sleep(delay)
 
     # Authentication related
 
@@ -102,5 +442,8 @@ class HTTPClient:
     # Manga related
 
     async def manga_list(self, *args, **kwargs) -> MangaListResult:
-        data = await self.request(MangaList(*args, **kwargs))
+        return await self.manga_list_route(MangaList(*args, **kwargs))
+
+    async def manga_list_route(self, route: MangaList) -> MangaListResult:
+        data = await self.request(route)
         return MangaListResult(data)
\ No newline at end of file
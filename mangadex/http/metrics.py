@@ -0,0 +1,156 @@
+import bisect
+from typing import Dict, Optional, Sequence, Tuple
+from ..routes.base import BaseRoute
+
+__all__ = (
+    'RequestHooks', 'Histogram', 'MetricsCollector'
+)
+
+# Default latency histogram buckets (in seconds)
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25,
+    0.5, 0.75, 1, 2.5, 5, 7.5, 10
+)
+
+class RequestHooks:
+    """Base class for request instrumentation hooks.
+
+    Subclass this and override the hooks you need, then pass it to
+    :class:`Client` or :class:`HTTPClient` with ``hooks`` parameter.
+    All hooks are called synchronously in the event loop, so they must not block.
+    """
+    def on_request_start(self, route: BaseRoute, attempt: int) -> None:
+        """Called before each attempt is sent"""
+        pass
+
+    def on_response(
+        self,
+        route: BaseRoute,
+        status: Optional[int],
+        queued: float,
+        wire: float,
+        decode: float
+    ) -> None:
+        """Called after each attempt is finished.
+
+        ``status`` is ``None`` if the attempt failed without response (connection error).
+        ``queued`` is time spent waiting for rate limiters, ``wire`` is time spent sending
+        request and reading response and ``decode`` is time spent decoding JSON (in seconds).
+        """
+        pass
+
+    def on_retry(self, route: BaseRoute, attempt: int, delay: float, error: BaseException) -> None:
+        """Called before sleeping for the next attempt"""
+        pass
+
+    def on_ratelimit(self, route: BaseRoute, delay: float) -> None:
+        """Called when the request is being rate limited (``429``),
+        ``delay`` is how long (in seconds) until the rate limit is resetted"""
+        pass
+
+class Histogram:
+    """Cumulative histogram with fixed buckets"""
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # Last one is for values higher than the last bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate ``q`` percentile (0 - 100) from the buckets, return ``None`` if empty.
+
+        The upper bound of the bucket is returned, values higher than
+        the last bucket are reported as ``inf``.
+        """
+        if not self.count:
+            return None
+        rank = self.count * q / 100
+        cumulative = 0
+        for pos, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                return self.buckets[pos] if pos < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def to_dict(self) -> dict:
+        return {
+            'buckets': dict(zip(self.buckets + (float('inf'),), self.counts)),
+            'count': self.count,
+            'sum': self.sum
+        }
+
+class MetricsCollector(RequestHooks):
+    """Built-in in-memory metrics collector
+
+    Collect latency histograms and counters labeled by route class name
+    (``MangaList``, ``Login``, ...) and HTTP status (``error`` for connection errors).
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self._buckets = buckets
+        # (route, status) -> Histogram
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queued: Dict[str, Histogram] = {}
+        self.decode: Dict[str, Histogram] = {}
+        # (route, status) -> count
+        self.responses: Dict[Tuple[str, str], int] = {}
+        # route -> count
+        self.requests: Dict[str, int] = {}
+        self.retries: Dict[str, int] = {}
+        self.ratelimited: Dict[str, int] = {}
+        self.ratelimit_delay: Dict[str, float] = {}
+
+    def _histogram(self, histograms, key) -> Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = Histogram(self._buckets)
+            histograms[key] = histogram
+        return histogram
+
+    def on_request_start(self, route, attempt):
+        name = type(route).__name__
+        self.requests[name] = self.requests.get(name, 0) + 1
+
+    def on_response(self, route, status, queued, wire, decode):
+        name = type(route).__name__
+        key = (name, 'error' if status is None else str(status))
+        self.responses[key] = self.responses.get(key, 0) + 1
+        self._histogram(self.latency, key).observe(wire)
+        self._histogram(self.queued, name).observe(queued)
+        if status == 200:
+            self._histogram(self.decode, name).observe(decode)
+
+    def on_retry(self, route, attempt, delay, error):
+        name = type(route).__name__
+        self.retries[name] = self.retries.get(name, 0) + 1
+
+    def on_ratelimit(self, route, delay):
+        name = type(route).__name__
+        self.ratelimited[name] = self.ratelimited.get(name, 0) + 1
+        self.ratelimit_delay[name] = self.ratelimit_delay.get(name, 0) + delay
+
+    def reset(self) -> None:
+        """Remove all collected metrics"""
+        for metrics in (
+            self.latency, self.queued, self.decode, self.responses,
+            self.requests, self.retries, self.ratelimited, self.ratelimit_delay
+        ):
+            metrics.clear()
+
+    def snapshot(self) -> dict:
+        """Return collected metrics as dict, for exporting to another metrics system"""
+        return {
+            'requests': dict(self.requests),
+            'responses': {'%s %s' % k: v for k, v in self.responses.items()},
+            'retries': dict(self.retries),
+            'ratelimited': dict(self.ratelimited),
+            'ratelimit_delay': dict(self.ratelimit_delay),
+            'latency': {'%s %s' % k: v.to_dict() for k, v in self.latency.items()},
+            'queued': {k: v.to_dict() for k, v in self.queued.items()},
+            'decode': {k: v.to_dict() for k, v in self.decode.items()}
+        }
@@ -1,6 +1,124 @@
+from typing import Dict, Iterable, List
+
+__all__ = (
+    'MangaListResult', 'MangaListColumns'
+)
+
 class MangaListResult(list):
     def __init__(self, data) -> None:
         super().__init__(data.get('data'))
         self._limit = data.get('limit')
         self._offset = data.get('offset')
-        self._total = data.get('total')
\ No newline at end of file
+        self._total = data.get('total')
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def to_columns(self) -> "MangaListColumns":
+        """Convert the page to :class:`MangaListColumns`"""
+        return MangaListColumns.from_result(self)
+
+class MangaListColumns:
+    """Columnar representation of manga list results
+
+    Each column is a list with one value for each manga, built in one pass
+    for each page. Use :meth:`MangaListColumns.concat()` to combine pages.
+
+    Columns:
+
+    - ``id``
+    - ``title`` (main title, the first language in the title data,
+      same as :attr:`Title.title`)
+    - ``year``
+    - ``status``
+    - ``content_rating``
+    - ``original_language``
+    - ``updated_at`` (ISO 8601 string, sortable as string)
+    """
+    COLUMNS = (
+        'id', 'title', 'year', 'status',
+        'content_rating', 'original_language', 'updated_at'
+    )
+    __slots__ = COLUMNS + ('total',)
+
+    def __init__(self, total: int = None, **columns) -> None:
+        self.total = total
+        for name in self.COLUMNS:
+            setattr(self, name, columns.get(name) or [])
+
+    @classmethod
+    def from_result(cls, data: List[dict]) -> "MangaListColumns":
+        """Build columns from list of raw manga data (ex: :class:`MangaListResult`)"""
+        ids = []
+        titles = []
+        years = []
+        statuses = []
+        content_ratings = []
+        original_languages = []
+        updated_ats = []
+
+        for item in data:
+            attrs = item.get('attributes') or {}
+            ids.append(item.get('id'))
+            title = attrs.get('title')
+            titles.append(next(iter(title.values()), None) if title else None)
+            years.append(attrs.get('year'))
+            statuses.append(attrs.get('status'))
+            content_ratings.append(attrs.get('contentRating'))
+            original_languages.append(attrs.get('originalLanguage'))
+            updated_ats.append(attrs.get('updatedAt'))
+
+        return cls(
+            total=getattr(data, 'total', None),
+            id=ids,
+            title=titles,
+            year=years,
+            status=statuses,
+            content_rating=content_ratings,
+            original_language=original_languages,
+            updated_at=updated_ats
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable["MangaListColumns"]) -> "MangaListColumns":
+        """Combine many batches into one"""
+        result = cls()
+        for batch in batches:
+            result.extend(batch)
+        return result
+
+    def extend(self, other: "MangaListColumns") -> None:
+        """Append all rows of another batch"""
+        for name in self.COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+        if other.total is not None:
+            self.total = other.total
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def row(self, pos: int) -> dict:
+        """Get one row as dict"""
+        return {name: getattr(self, name)[pos] for name in self.COLUMNS}
+
+    def select(self, positions: Iterable[int]) -> "MangaListColumns":
+        """Make new batch from rows at given positions (ex: result of filtering a column)"""
+        positions = list(positions)
+        columns = {}
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            columns[name] = [column[pos] for pos in positions]
+        return MangaListColumns(total=self.total, **columns)
+
+    def to_dict(self) -> Dict[str, list]:
+        """Return columns as dict, ex: for ``pandas.DataFrame``"""
+        return {name: getattr(self, name) for name in self.COLUMNS}
@@ -0,0 +1,154 @@
+import random
+import time
+import logging
+from typing import Dict, Iterable, Optional, Type
+from ..routes.base import BaseRoute
+from ..errors import CircuitBreakerOpen
+
+__all__ = (
+    'RetryPolicy', 'CircuitBreaker'
+)
+
+log = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """Circuit breaker for a route.
+
+    After ``failure_threshold`` consecutive failures the circuit is opened and
+    requests are failing fast with :class:`CircuitBreakerOpen` until
+    ``recovery_timeout`` is passed. After that one request is allowed to go through
+    (half-open), if it's successful the circuit is closed again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        elif time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def check(self) -> bool:
+        """Raise :class:`CircuitBreakerOpen` if request is not allowed
+
+        Return ``True`` if the request is the half-open trial, the caller
+        must call :meth:`release_trial()` after the attempt is done.
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return False
+        elif state == self.HALF_OPEN and not self._trial:
+            # Let one request go through
+            self._trial = True
+            return True
+
+        raise CircuitBreakerOpen('Circuit breaker for "%s" is open' % self.name)
+
+    def release_trial(self) -> None:
+        """Allow another trial request if the trial is done without
+        success or failure (rate limited, cancelled, ...)"""
+        self._trial = False
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            log.info('Circuit breaker for "%s" is closed' % self.name)
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or (self._opened_at is None and self.failures >= self.failure_threshold):
+            log.warning('Circuit breaker for "%s" is open (failures: %s)' % (
+                self.name,
+                self.failures
+            ))
+            self._opened_at = time.monotonic()
+            self._trial = False
+
+class RetryPolicy:
+    """Retry policy for HTTP requests
+
+    Parameters
+    -----------
+    max_attempts: :class:`int`
+        Maximum attempts for each request (including the first one).
+    retry_statuses: Iterable[:class:`int`]
+        HTTP statuses that will be retried, other error statuses are raised immediately.
+        ``429`` is retried according to rate limit headers if available.
+    backoff_base: :class:`float`
+        Base delay (in seconds) for exponential backoff.
+    backoff_max: :class:`float`
+        Maximum delay (in seconds) for exponential backoff.
+    deadline: Optional[:class:`float`]
+        Maximum time (in seconds) for each request including retries and
+        waiting for rate limiters, ``None`` for no deadline.
+    failure_threshold: Optional[:class:`int`]
+        Consecutive failures (server errors and connection errors) before
+        circuit breaker of the route is opened, ``None`` to disable circuit breaker.
+    recovery_timeout: :class:`float`
+        How long (in seconds) circuit breaker stay open before allowing a trial request.
+
+    Note
+    -----
+    Retried statuses (``429`` and server errors by default) that are still failing
+    after all attempts, or exceeding the deadline, raise :class:`RetryError`
+    (with the last error in :attr:`RetryError.last_exception`) instead of
+    :class:`ServerError` or :class:`HTTPException`. Statuses that are not retried
+    are raised as is.
+    """
+    def __init__(
+        self,
+        max_attempts: int = 5,
+        retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        backoff_base: float = 1,
+        backoff_max: float = 30,
+        deadline: Optional[float] = None,
+        failure_threshold: Optional[int] = 5,
+        recovery_timeout: float = 30
+    ) -> None:
+        if not isinstance(max_attempts, int):
+            raise ValueError('max_attempts must be int')
+        elif max_attempts <= 0:
+            raise ValueError('max_attempts must be higher than 0')
+        self.max_attempts = max_attempts
+        self.retry_statuses = frozenset(retry_statuses)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        # Route class -> CircuitBreaker
+        self._circuit_breakers: Dict[Type[BaseRoute], CircuitBreaker] = {}
+
+    def should_retry(self, status: int) -> bool:
+        """Check if given HTTP status should be retried"""
+        return status in self.retry_statuses
+
+    def get_backoff(self, attempt: int) -> float:
+        """Get delay before next attempt, exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get_circuit_breaker(self, route: BaseRoute) -> Optional[CircuitBreaker]:
+        """Get circuit breaker for given route, return ``None`` if it's disabled"""
+        if self.failure_threshold is None:
+            return None
+
+        cls = type(route)
+        breaker = self._circuit_breakers.get(cls)
+        if breaker is None:
+            breaker = CircuitBreaker(cls.__name__, self.failure_threshold, self.recovery_timeout)
+            self._circuit_breakers[cls] = breaker
+        return breaker
@@ -0,0 +1,217 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+import logging
+from collections import deque
+from typing import Dict, List, Optional
+from multidict import CIMultiDict, CIMultiDictProxy
+from .cache import make_request_key
+from ..errors import ReplayError
+
+__all__ = (
+    'TransportResponse', 'Transport', 'AiohttpTransport',
+    'RecordingTransport', 'ReplayTransport'
+)
+
+log = logging.getLogger(__name__)
+
+class TransportResponse:
+    """Fully read HTTP response returned by :class:`Transport`"""
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status: int, headers, body: bytes) -> None:
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.body = body
+
+    def __repr__(self) -> str:
+        return '<TransportResponse status=%s>' % self.status
+
+class Transport:
+    """Base class for transport used by :class:`HTTPClient` to send requests.
+
+    ``params`` is the output of :meth:`BaseRoute.build_request()`.
+    """
+    # If this is ``False``, HTTPClient will not create aiohttp session
+    requires_session = True
+
+    async def send(self, session, params: dict) -> TransportResponse:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class AiohttpTransport(Transport):
+    """Send requests to the network using aiohttp session of :class:`HTTPClient`"""
+    async def send(self, session, params: dict) -> TransportResponse:
+        async with session.request(**params) as resp:
+            body = await resp.read()
+            return TransportResponse(resp.status, resp.headers, body)
+
+# Replaced value of secrets in recorded responses
+REDACTED = 'REDACTED'
+
+def _redact_request_body(body):
+    # Refresh token in RefreshToken requests,
+    # replayed requests may send "REDACTED" token from recorded Login response
+    if isinstance(body, dict) and isinstance(body.get('token'), str):
+        body = dict(body, token=REDACTED)
+    return body
+
+def _make_cassette_key(params: dict) -> str:
+    # Use JSON string for key, so it can be compared with
+    # keys loaded from cassette file.
+    # JSON body is hashed, so credentials (ex: Login password) are not written to cassette
+    body = params.get('json')
+    if body is not None:
+        body = _redact_request_body(body)
+        body = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+    return json.dumps([make_request_key(params), body], sort_keys=True)
+
+def _redact_body(body: bytes) -> bytes:
+    # Session and refresh token from Login and RefreshToken responses
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+
+    token = data.get('token') if isinstance(data, dict) else None
+    if not isinstance(token, dict):
+        return body
+    data['token'] = {key: REDACTED for key in token}
+    return json.dumps(data).encode('utf-8')
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {'text': body.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {'base64': base64.b64encode(body).decode('ascii')}
+
+def _decode_body(data: dict) -> bytes:
+    if 'base64' in data:
+        return base64.b64decode(data['base64'])
+    return data['text'].encode('utf-8')
+
+class RecordingTransport(Transport):
+    """Transport that send requests with another transport and record
+    request and response pairs to cassette file.
+
+    The cassette is written when :meth:`RecordingTransport.save()` is called
+    or when the transport is closed.
+
+    Parameters
+    -----------
+    path: :class:`str`
+        Path to the cassette file.
+    transport: Optional[:class:`Transport`]
+        Transport used to send requests, default to :class:`AiohttpTransport`.
+    record_secrets: :class:`bool`
+        If this ``False`` (default), session and refresh tokens in responses are
+        replaced with ``"REDACTED"``. Request JSON bodies (ex: login credentials)
+        are never written, only their SHA-256 hash is used to match the requests.
+        Tokens in request JSON bodies are redacted before hashing, so requests
+        sent with redacted tokens can be replayed.
+    """
+    def __init__(self, path: str, transport: Transport = None, record_secrets: bool = False) -> None:
+        self.path = path
+        self.transport = transport or AiohttpTransport()
+        self.record_secrets = record_secrets
+        self.requires_session = self.transport.requires_session
+        self._entries: List[dict] = []
+
+    async def send(self, session, params: dict) -> TransportResponse:
+        resp = await self.transport.send(session, params)
+        self._entries.append({
+            'key': _make_cassette_key(params),
+            'request': {
+                'method': params['method'],
+                'url': params['url']
+            },
+            'response': {
+                'status': resp.status,
+                'headers': list(resp.headers.items()),
+                'body': _encode_body(resp.body if self.record_secrets else _redact_body(resp.body))
+            }
+        })
+        return resp
+
+    def save(self) -> None:
+        """Write recorded requests to cassette file"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=1)
+        log.debug('%s recorded requests is written to "%s"' % (len(self._entries), self.path))
+
+    async def close(self) -> None:
+        self.save()
+        await self.transport.close()
+
+class ReplayTransport(Transport):
+    """Transport that serve responses from cassette file without network.
+
+    Identical requests are served in recorded order, if there are no more
+    recorded responses, the last one is served again.
+    :exc:`ReplayError` is raised if the request is not recorded.
+
+    Parameters
+    -----------
+    path: :class:`str`
+        Path to the cassette file recorded by :class:`RecordingTransport`.
+    latency: :class:`float`
+        Injected latency (in seconds) for each response.
+    ratelimit_every: Optional[:class:`int`]
+        Inject ``429`` response every ``ratelimit_every`` requests.
+    ratelimit_delay: :class:`float`
+        Rate limit reset time (in seconds) for injected ``429`` responses.
+    """
+    requires_session = False
+
+    def __init__(
+        self,
+        path: str,
+        latency: float = 0,
+        ratelimit_every: Optional[int] = None,
+        ratelimit_delay: float = 1
+    ) -> None:
+        self.path = path
+        self.latency = latency
+        self.ratelimit_every = ratelimit_every
+        self.ratelimit_delay = ratelimit_delay
+        self.requests = 0
+
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+
+        # key -> recorded responses
+        self._responses: Dict[str, deque] = {}
+        for entry in entries:
+            resp = entry['response']
+            self._responses.setdefault(entry['key'], deque()).append(TransportResponse(
+                resp['status'],
+                resp['headers'],
+                _decode_body(resp['body'])
+            ))
+
+    async def send(self, session, params: dict) -> TransportResponse:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.ratelimit_every and self.requests % self.ratelimit_every == 0:
+            return TransportResponse(
+                429,
+                {
+                    'x-ratelimit-remaining': '0',
+                    'x-ratelimit-retry-after': str(time.time() + self.ratelimit_delay)
+                },
+                b'{"result": "error", "errors": []}'
+            )
+
+        responses = self._responses.get(_make_cassette_key(params))
+        if not responses:
+            raise ReplayError('No recorded response for "%s %s"' % (params['method'], params['url']))
+
+        if len(responses) > 1:
+            return responses.popleft()
+        return responses[0]
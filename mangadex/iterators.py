@@ -1,50 +1,463 @@
 import asyncio
-from typing import List
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Optional, Tuple
 from .manga import Manga
+from .http.result import MangaListColumns
+from .routes.manga import MangaList
+from .utils.manga import MangaListOrder
+from .watermark import Watermark
+
+log = logging.getLogger(__name__)
 
 # According to https://api.mangadex.org/docs.html#section/Result-Limit
 RESULT_LIMIT_MANGA = 10000
 
+def _cancel_tasks(tasks) -> None:
+    for task in tasks:
+        task.cancel()
+
 class MangaIterator:
+    """Iterate manga search results page by page.
+
+    Only the current page is kept in memory, plus up to ``prefetch`` pages
+    fetched ahead (if prefetch is enabled), so memory stays flat on big searches.
+
+    Prefetched pages are cancelled when the iterator is exhausted, closed, used
+    as async context manager (``async with``) and exited, or garbage collected.
+    """
     def __init__(self, **kwargs) -> None:
         self._limit = kwargs.pop('limit')
         self._http = kwargs.pop('http')
+        self._prefetch = kwargs.pop('prefetch', 0) or 0
         self._offset = 0
+        self._total = None
         self._kwargs = kwargs
-        self._queue = asyncio.Queue()
+
+        # Search route, validated once and reused for every page
+        self._route = None
+
+        # Current page and position of next manga in it
+        self._page = []
+        self._pos = 0
+
+        # Prefetched pages (in offset order)
+        self._pending = deque()
 
     def __aiter__(self) -> "MangaIterator":
         return self
     
     async def __anext__(self) -> Manga:
-        if self._queue.empty():
-            await self._fill_data()
-        
-        try:
-            return self._queue.get_nowait()
-        except asyncio.QueueEmpty:
-            raise StopAsyncIteration()
+        while self._pos >= len(self._page):
+            page = await self._next_page_data()
+            if page is None:
+                raise StopAsyncIteration()
+            self._page = self._create_mangas(page)
+            self._pos = 0
+
+        manga = self._page[self._pos]
+        self._pos += 1
+        return manga
+
+    async def iter_pages(self, raw: bool = False) -> AsyncIterator[List[Manga]]:
+        """Iterate results page by page
+
+        Parameters
+        -----------
+        raw: :class:`bool`
+            If this ``True``, :class:`MangaListResult` (list of raw manga data)
+            is yielded instead of list of :class:`Manga`.
+        """
+        # Yield the rest of current page first
+        if self._pos < len(self._page):
+            if raw:
+                raise RuntimeError('Cannot iterate raw pages after the iterator is partially consumed')
+            page = self._page[self._pos:]
+            self._page = []
+            self._pos = 0
+            yield page
+
+        while True:
+            page = await self._next_page_data()
+            if page is None:
+                return
+            yield page if raw else self._create_mangas(page)
+
+    async def iter_columns(self) -> AsyncIterator[MangaListColumns]:
+        """Iterate results page by page as :class:`MangaListColumns`,
+        without creating :class:`Manga` objects"""
+        async for page in self.iter_pages(raw=True):
+            yield page.to_columns()
+
+    async def flatten_columns(self) -> MangaListColumns:
+        """Fetch all results as one :class:`MangaListColumns`"""
+        return MangaListColumns.concat([i async for i in self.iter_columns()])
 
     async def flatten(self) -> List[Manga]:
+        mangas = None
+        pos = 0
+        async for page in self.iter_pages():
+            if mangas is None:
+                # Presize the list from total results,
+                # it's right after the first page is fetched
+                size = len(page) + self._remaining()
+                mangas = [None] * size
+
+            end = pos + len(page)
+            if end > len(mangas):
+                mangas.extend([None] * (end - len(mangas)))
+            mangas[pos:end] = page
+            pos = end
+
+        if mangas is None:
+            return []
+        del mangas[pos:]
+        return mangas
+
+    async def get_total(self) -> int:
+        """Get total results of the search (fetching one manga)"""
+        data = await self._fetch_page(0, 1)
+        return data.total
+
+    def close(self) -> None:
+        """Cancel all prefetched pages"""
+        self._limit = 0
+        while self._pending:
+            self._pending.popleft().cancel()
+
+    async def aclose(self) -> None:
+        """Same as :meth:`close()`, for ``async with`` and :func:`contextlib.aclosing`"""
+        self.close()
+
+    async def __aenter__(self) -> "MangaIterator":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # Breaking out of "async for" leaves prefetched pages running
+        pending = getattr(self, '_pending', None)
+        if not pending:
+            return
+        # __del__ may run in any thread (ex: SyncClient),
+        # Task.cancel() is not thread-safe so it's done in the event loop
+        tasks = tuple(pending)
+        pending.clear()
+        try:
+            tasks[0].get_loop().call_soon_threadsafe(_cancel_tasks, tasks)
+        except RuntimeError:
+            # The event loop is closed
+            pass
+
+    def _remaining(self) -> int:
+        # Remaining results that can be fetched (estimated)
+        end = RESULT_LIMIT_MANGA
+        if self._total is not None:
+            end = min(self._total, end)
+        # Prefetched pages are not counted
+        return max(min(self._limit, end - self._offset), 0)
+
+    def _create_mangas(self, data) -> List[Manga]:
+        http = self._http
+        return [Manga(item, http) for item in data]
+
+    def _next_page(self) -> Optional[Tuple[int, int]]:
+        # Return offset and limit for next page,
+        # or None if there is no more pages
+        end = RESULT_LIMIT_MANGA
+        if self._total is not None:
+            end = min(self._total, end)
+
+        if self._limit <= 0 or self._offset >= end:
+            return None
+
+        limit = min(self._limit, 100, end - self._offset)
+        page = (self._offset, limit)
+        self._limit -= limit
+        self._offset += limit
+        return page
+
+    def _get_route(self, offset, limit) -> MangaList:
+        if self._route is None:
+            kwargs = self._kwargs.copy()
+            kwargs['limit'] = limit
+            kwargs['offset'] = offset
+            self._route = MangaList(**kwargs)
+            return self._route
+        return self._route.with_page(offset, limit)
+
+    async def _fetch_page(self, offset, limit):
+        return await self._http.manga_list_route(self._get_route(offset, limit))
+
+    def _schedule_prefetch(self):
+        # Keep N pages in-flight
+        while len(self._pending) < self._prefetch:
+            page = self._next_page()
+            if page is None:
+                return
+            # The task doesn't reference the iterator,
+            # so it can be cancelled in __del__() when the iterator is dropped
+            route = self._get_route(*page)
+            self._pending.append(asyncio.ensure_future(self._http.manga_list_route(route)))
+
+    async def _next_page_data(self):
+        # Return data of next page, or None if there is no more results
+        if self._prefetch and self._total is not None:
+            self._schedule_prefetch()
+            if not self._pending:
+                return None
+            try:
+                data = await self._pending.popleft()
+            except BaseException:
+                self.close()
+                raise
+            self._schedule_prefetch()
+        else:
+            page = self._next_page()
+            if page is None:
+                return None
+            data = await self._fetch_page(*page)
+
+            # The first page reveals total results
+            self._total = data.total
+
+        if not data:
+            # No more results
+            self.close()
+            return None
+        return data
+
+def _to_utc(dt: datetime) -> datetime:
+    # Naive UTC datetime, same as the one used in MangaList created_at_since
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+class ShardedMangaIterator:
+    """Crawl manga past :data:`RESULT_LIMIT_MANGA` by splitting the search
+    into time windows (by ``createdAt``) that each stay under the limit.
+
+    Window boundaries are found by probing total results with ``created_at_since``
+    and bisecting windows that are too large. Windows are crawled concurrently
+    with ``MangaListOrder(created_at='asc')`` and yielded in order, manga
+    across window boundaries are deduplicated.
+    """
+    def __init__(
+        self,
+        search: Callable[..., MangaIterator],
+        since: datetime = None,
+        until: datetime = None,
+        shard_size: int = RESULT_LIMIT_MANGA,
+        concurrency: int = 4,
+        prefetch: int = 0
+    ) -> None:
+        if shard_size > RESULT_LIMIT_MANGA or shard_size <= 0:
+            raise ValueError('shard_size range must be from 1 to %s' % RESULT_LIMIT_MANGA)
+        if concurrency <= 0:
+            raise ValueError('concurrency must be higher than 0')
+        self._search = search
+        self._since = _to_utc(since or datetime(1970, 1, 1))
+        self._until = _to_utc(until) if until else None
+        self._shard_size = shard_size
+        self._concurrency = concurrency
+        self._prefetch = prefetch
+        self._semaphore = None
+        self._generator = None
+
+    def _create_search(self, since: datetime, limit: int, prefetch: int = 0) -> MangaIterator:
+        return self._search(
+            limit=limit,
+            created_at_since=since,
+            order=MangaListOrder(created_at='asc', latest_uploaded_chapter=None),
+            prefetch=prefetch
+        )
+
+    async def _count(self, since: datetime) -> int:
+        # Total manga created at or after given time
+        async with self._semaphore:
+            return await self._create_search(since, 1).get_total()
+
+    async def _split(self, start, end, count_start, count_end) -> List[Tuple[datetime, Optional[datetime]]]:
+        count = count_start - count_end
+        if count <= 0:
+            return []
+        elif count <= self._shard_size:
+            return [(start, end)]
+
+        # created_at_since is sent in whole seconds, bisect on whole seconds
+        upper = end or datetime.utcnow().replace(microsecond=0)
+        mid = (start + (upper - start) / 2).replace(microsecond=0)
+        if mid <= start or mid >= upper:
+            # We can't split it anymore
+            log.warning('Time window from %s has %s manga, only %s of them can be fetched' % (
+                start,
+                count,
+                RESULT_LIMIT_MANGA
+            ))
+            return [(start, end)]
+
+        count_mid = await self._count(mid)
+        left, right = await asyncio.gather(
+            self._split(start, mid, count_start, count_mid),
+            self._split(mid, end, count_mid, count_end)
+        )
+        return left + right
+
+    async def get_shards(self) -> List[Tuple[datetime, Optional[datetime]]]:
+        """Get time windows ``(since, until)`` of the crawl, ``until`` is ``None``
+        for the last window if there is no ``until`` given"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+        if self._until is None:
+            count_start = await self._count(self._since)
+            count_end = 0
+        else:
+            count_start, count_end = await asyncio.gather(
+                self._count(self._since),
+                self._count(self._until)
+            )
+        return await self._split(self._since, self._until, count_start, count_end)
+
+    async def _crawl(self, start: datetime, end: Optional[datetime]) -> List[Manga]:
         mangas = []
-        while True:
+        async with self._semaphore:
+            iterator = self._create_search(start, RESULT_LIMIT_MANGA, self._prefetch)
             try:
-                manga = await self.__anext__()
-            except StopAsyncIteration:
-                return mangas
+                async for manga in iterator:
+                    if end is not None and _to_utc(manga.created_at) >= end:
+                        break
+                    mangas.append(manga)
+            finally:
+                iterator.close()
+        return mangas
+
+    async def _iterate(self):
+        shards = deque(await self.get_shards())
+        pending = deque()
+        seen = set()
+        try:
+            while shards or pending:
+                while shards and len(pending) < self._concurrency:
+                    pending.append(asyncio.ensure_future(self._crawl(*shards.popleft())))
+
+                for manga in await pending.popleft():
+                    if manga.id in seen:
+                        continue
+                    seen.add(manga.id)
+                    yield manga
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def __aiter__(self) -> "ShardedMangaIterator":
+        return self
+
+    async def __anext__(self) -> Manga:
+        if self._generator is None:
+            self._generator = self._iterate()
+        return await self._generator.__anext__()
+
+    async def flatten(self) -> List[Manga]:
+        return [manga async for manga in self]
+
+
+class UpdatesIterator:
+    """Iterate manga updated since the last run of the feed
+
+    Manga are searched with ``updated_at_since`` from the watermark and
+    ``MangaListOrder(updated_at='asc')``, the watermark is advanced after each page
+    and the next page is searched from the advanced watermark (keyset paging), so
+    manga updated during the crawl don't shift the pages.
+    ``prefetch`` is not used, because every page depends on the previous one.
+    """
+    def __init__(
+        self,
+        search: Callable[..., MangaIterator],
+        watermark: Watermark,
+        name: str = 'default',
+        since: datetime = None,
+        prefetch: int = 0,
+        poll_interval: float = None
+    ) -> None:
+        self._search = search
+        self._watermark = watermark
+        self._name = name
+        self._since = _to_utc(since or datetime(1970, 1, 1))
+        self._prefetch = prefetch
+        self._poll_interval = poll_interval
+        self._generator = None
+
+    async def _iterate_once(self):
+        loop = asyncio.get_running_loop()
+
+        # Watermark storage may block (file and database I/O)
+        state = await loop.run_in_executor(None, self._watermark.load, self._name)
+        if state is None:
+            since, seen = self._since, set()
+        else:
+            since, seen = state
+
+        # Keyset paging, every page is searched from the advanced watermark.
+        # With offset paging, manga updated during the crawl are moved to the end
+        # and the rest are shifted, so manga at page boundary would be skipped.
+        iterator = self._search(
+            limit=RESULT_LIMIT_MANGA,
+            order=MangaListOrder(updated_at='asc', latest_uploaded_chapter=None)
+        )
+        offset = 0
+        while True:
+            # updated_at_since is changed, the route must be built again
+            iterator._route = None
+            iterator._kwargs['updated_at_since'] = since
+            data = await iterator._fetch_page(offset, 100)
+
+            progressed = False
+            for manga in iterator._create_mangas(data):
+                updated_at = _to_utc(manga.updated_at)
+                if updated_at > since:
+                    since = updated_at
+                    seen = set()
+                elif manga.id in seen:
+                    continue
+                seen.add(manga.id)
+                progressed = True
+                yield manga
+
+            if len(data) < 100:
+                await loop.run_in_executor(None, self._watermark.save, self._name, since, set(seen))
+                return
+            elif progressed:
+                offset = 0
+                await loop.run_in_executor(None, self._watermark.save, self._name, since, set(seen))
             else:
-                mangas.append(manga)
+                # The whole page is updated at the same time as the watermark
+                # and already processed, skip them
+                offset = len(seen)
+                if offset + 100 > RESULT_LIMIT_MANGA:
+                    log.warning('More than %s manga updated at %s, some of them are skipped' % (
+                        RESULT_LIMIT_MANGA,
+                        since
+                    ))
+                    return
 
-    async def _fill_data(self):
-        if self._limit > 0:
-            kwargs = self._kwargs.copy()
-            limit = self._limit if self._limit <= 100 else 100
-            kwargs['limit'] = limit
-            kwargs['offset'] = self._offset
-
-            data = await self._http.manga_list(**kwargs)
-            if data:
-                self._limit -= limit
-                self._offset += limit
-                for item in data:
-                    await self._queue.put(Manga(item, self._http))
\ No newline at end of file
+    async def _iterate(self):
+        while True:
+            async for manga in self._iterate_once():
+                yield manga
+            if self._poll_interval is None:
+                return
+            await asyncio.sleep(self._poll_interval)
+
+    def __aiter__(self) -> "UpdatesIterator":
+        return self
+
+    async def __anext__(self) -> Manga:
+        if self._generator is None:
+            self._generator = self._iterate()
+        return await self._generator.__anext__()
+
+    async def flatten(self) -> List[Manga]:
+        return [manga async for manga in self]
@@ -1,16 +1,152 @@
-from .types.manga import Title
+from datetime import datetime
+from typing import Dict, List, Optional
+from .types.manga import Title, LinkData, Status, ContentRating, Relationship, parse_links
+from .entity import Entity, EntityCache
+
+__all__ = (
+    'Manga', 'MangaBulkResult'
+)
+
+# Marker for attributes that are not parsed yet
+_MISSING = object()
 
 class Manga:
+    """MangaDex manga
+
+    Titles, alternative titles, links and description are parsed
+    on first access and cached.
+
+    Tags and related entities are interned to :class:`EntityCache` of the client
+    on first access of :attr:`tags` or :attr:`relationships` (or the properties
+    using them), so they are shared with other manga and can be looked up
+    with :meth:`Client.get_entity()`.
+    """
+    __slots__ = (
+        '_id', '_type', '_http', '_data',
+        '_title', '_alternative_titles', '_tags', '_links', '_description',
+        '_relationships', '_entities'
+    )
+
     def __init__(self, data, http) -> None:
         self._id = data.get('id')
         self._type = data.get('type')
         self._http = http
-        self._data = data.get('attributes')
+        self._data = data.get('attributes') or {}
+        self._relationships = data.get('relationships') or ()
+
+        self._tags = _MISSING
+        self._entities = _MISSING
+        self._title = _MISSING
+        self._alternative_titles = _MISSING
+        self._links = _MISSING
+        self._description = _MISSING
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def title(self) -> Title:
+        if self._title is _MISSING:
+            self._title = Title(self._data.get('title'))
+        return self._title
+
+    @property
+    def alternative_titles(self) -> List[Title]:
+        if self._alternative_titles is _MISSING:
+            self._alternative_titles = [Title(i) for i in self._data.get('altTitles') or ()]
+        return self._alternative_titles
+
+    @property
+    def description(self) -> Optional[Title]:
+        if self._description is _MISSING:
+            description = self._data.get('description')
+            self._description = Title(description) if description else None
+        return self._description
+
+    def _get_entity_cache(self) -> EntityCache:
+        entities = getattr(self._http, 'entities', None)
+        if entities is None:
+            # There is no shared identity map (ex: Manga without HTTPClient)
+            entities = EntityCache()
+        return entities
+
+    @property
+    def tags(self) -> List[Entity]:
+        if self._tags is _MISSING:
+            intern_data = self._get_entity_cache().intern_data
+            self._tags = [intern_data(i) for i in self._data.get('tags') or ()]
+        return self._tags
+
+    @property
+    def relationships(self) -> List[Entity]:
+        """Related entities, shared with other manga through :class:`EntityCache`"""
+        if self._entities is _MISSING:
+            intern_data = self._get_entity_cache().intern_data
+            self._entities = [intern_data(i) for i in self._relationships]
+            # Raw relationships are not needed anymore
+            self._relationships = ()
+        return self._entities
 
-        self.title = Title(self._data.get('title'))
-        self.alternative_titles = [Title(i) for i in self._data.get('altTitles')]
+    def _get_relationships(self, _type: Relationship) -> List[Entity]:
+        return [i for i in self.relationships if i.type == _type]
+
+    @property
+    def authors(self) -> List[Entity]:
+        return self._get_relationships(Relationship.AUTHOR)
+
+    @property
+    def artists(self) -> List[Entity]:
+        return self._get_relationships(Relationship.ARTIST)
+
+    @property
+    def cover_art(self) -> Optional[Entity]:
+        covers = self._get_relationships(Relationship.COVER_ART)
+        return covers[0] if covers else None
+
+    @property
+    def links(self) -> Dict[str, LinkData]:
+        if self._links is _MISSING:
+            self._links = parse_links(self._data.get('links'))
+        return self._links
+
+    @property
+    def original_language(self) -> Optional[str]:
+        return self._data.get('originalLanguage')
+
+    @property
+    def year(self) -> Optional[int]:
+        return self._data.get('year')
+
+    @property
+    def status(self) -> Optional[Status]:
+        status = self._data.get('status')
+        return Status(status) if status else None
+
+    @property
+    def content_rating(self) -> Optional[ContentRating]:
+        content_rating = self._data.get('contentRating')
+        return ContentRating(content_rating) if content_rating else None
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromisoformat(self._data.get('createdAt'))
+
+    @property
+    def updated_at(self) -> datetime:
+        return datetime.fromisoformat(self._data.get('updatedAt'))
     
     def __repr__(self) -> str:
         return '<Manga title="%s">' % (
             self.title
-        )
\ No newline at end of file
+        )
+
+class MangaBulkResult(Dict[str, Manga]):
+    """Result of :meth:`Client.get_manga_bulk()`
+
+    A dict of manga ID to :class:`Manga` in input order,
+    IDs that are not found are listed in :attr:`MangaBulkResult.missing`.
+    """
+    def __init__(self, mangas: Dict[str, Manga], missing: List[str]) -> None:
+        super().__init__(mangas)
+        self.missing = missing
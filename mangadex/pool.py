@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from typing import Iterable, List
+from .http import HTTPClient
+from .http.experimental_ratelimiter import RateLimiter
+from .routes.base import BaseRoute, RequireLogin
+from .routes.auth import SESSION_TOKEN_LIFETIME, SESSION_REFRESH_MARGIN
+from .errors import HTTPException, MangaDexException, NotLoggedIn
+
+__all__ = (
+    'SessionPool', 'PoolSession'
+)
+
+log = logging.getLogger(__name__)
+
+class PoolSession:
+    """Logged in account of :class:`SessionPool`
+
+    Every account has its own rate budget (``requests_per_minute``),
+    authenticated requests are metered by it before sent.
+    The session token is refreshed when it's about to expire.
+    """
+    def __init__(self, credentials: dict, requests_per_minute: int) -> None:
+        self.credentials = credentials
+        self.session_token = None
+        self.refresh_token = None
+        self.refreshed_at = None
+        self.requests = 0
+        self._refresh_lock = asyncio.Lock()
+        self._name = credentials.get('username') or credentials.get('email')
+        self._limiter = RateLimiter.per_minute(self._name, requests_per_minute)
+
+    @property
+    def name(self) -> str:
+        """Username or email of the account"""
+        return self._name
+
+    @property
+    def logged_in(self) -> bool:
+        return self.session_token is not None
+
+    @property
+    def stale(self) -> bool:
+        """``True`` if the session token is about to expire"""
+        if self.refreshed_at is None:
+            return False
+        return time.monotonic() - self.refreshed_at >= SESSION_TOKEN_LIFETIME - SESSION_REFRESH_MARGIN
+
+    def _set_tokens(self, result):
+        self.session_token = result.session_token
+        self.refresh_token = result.refresh_token
+        self.refreshed_at = time.monotonic()
+
+    @property
+    def remaining(self) -> int:
+        """Requests remaining in current rate budget of the account"""
+        return self._limiter.remaining
+
+    def __repr__(self) -> str:
+        return '<PoolSession name="%s" logged_in=%s>' % (self._name, self.logged_in)
+
+class SessionPool:
+    """Pool of logged in MangaDex accounts
+
+    Authenticated requests are spread across all accounts, every request
+    is sent with the account that has the most rate budget left, so
+    authenticated throughput scales with the number of accounts.
+
+    Authentication is carried by each route (see :meth:`RequireLogin.set_auth_token()`),
+    so many accounts can be used concurrently in one :class:`Client`.
+    Session tokens are refreshed when they are about to expire, or when
+    a request is rejected with ``401``.
+
+    Parameters
+    -----------
+    http: :class:`HTTPClient`
+        HTTP client used for all accounts.
+    accounts: List[:class:`dict`]
+        Credentials of each account, same parameters as :meth:`Client.login()`.
+    requests_per_minute: :class:`int`
+        Rate budget of each account.
+    """
+    def __init__(
+        self,
+        http: HTTPClient,
+        accounts: Iterable[dict],
+        requests_per_minute: int = 300
+    ) -> None:
+        if not isinstance(requests_per_minute, int) or requests_per_minute <= 0:
+            raise ValueError('requests_per_minute must be positive int')
+        self._http = http
+        self._sessions = [PoolSession(dict(i), requests_per_minute) for i in accounts]
+        if not self._sessions:
+            raise ValueError('at least provide one account')
+
+    @property
+    def sessions(self) -> List[PoolSession]:
+        return list(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def _login(self, session: PoolSession):
+        result = await self._http.login(**session.credentials)
+        session._set_tokens(result)
+
+    async def login(self) -> None:
+        """Login all accounts concurrently"""
+        await asyncio.gather(*[self._login(i) for i in self._sessions if not i.logged_in])
+
+    async def refresh(self, session: PoolSession) -> None:
+        """Refresh session of given account, login again if failed"""
+        try:
+            result = await self._http.refresh_token(session.refresh_token)
+        except MangaDexException as e:
+            log.debug('Failed to refresh session of "%s", logging in again (%r)' % (session.name, e))
+            await self._login(session)
+            return
+        session._set_tokens(result)
+
+    async def logout(self) -> None:
+        """Logout all accounts"""
+        async def logout(session):
+            await self._http.logout(session.session_token)
+            session.session_token = None
+            session.refresh_token = None
+            session.refreshed_at = None
+
+        await asyncio.gather(*[logout(i) for i in self._sessions if i.logged_in])
+
+    def _get_session(self) -> PoolSession:
+        sessions = [i for i in self._sessions if i.logged_in]
+        if not sessions:
+            raise NotLoggedIn('No account is logged in')
+
+        # The account with the most rate budget left,
+        # least used account first if there is a tie
+        return max(sessions, key=lambda i: (i.remaining, -i.requests))
+
+    async def acquire(self) -> PoolSession:
+        """Acquire an account, wait if its rate budget is exhausted.
+
+        :meth:`SessionPool.release()` must be called after the request is done.
+        """
+        session = self._get_session()
+        session.requests += 1
+        if session.stale:
+            await self._refresh_session(session, session.session_token)
+        await session._limiter.acquire()
+        return session
+
+    async def _refresh_session(self, session: PoolSession, token: str):
+        # Concurrent requests of the account refresh it only once,
+        # the session is not refreshed if the token is already replaced
+        async with session._refresh_lock:
+            if session.session_token == token:
+                await self.refresh(session)
+
+    async def release(self, session: PoolSession) -> None:
+        await session._limiter.release()
+
+    async def request(self, route: BaseRoute):
+        """Send authenticated request with one of the accounts"""
+        if not isinstance(route, RequireLogin):
+            raise ValueError('route must be RequireLogin')
+        session = await self.acquire()
+        try:
+            token = session.session_token
+            route.set_auth_token(token)
+            try:
+                return await self._http.request(route)
+            except HTTPException as e:
+                if e.status != 401:
+                    raise
+
+            # Session token is expired or revoked, refresh and try again once.
+            # The retry is another request, it's metered by the account budget too
+            await self._refresh_session(session, token)
+            session.requests += 1
+            await session._limiter.acquire()
+            route.set_auth_token(session.session_token)
+            return await self._http.request(route)
+        finally:
+            await self.release(session)
@@ -6,6 +6,13 @@ __all__ = (
     'RefreshToken', 'Logout'
 )
 
+# According to https://api.mangadex.org/docs.html#section/Authentication
+# session token is valid for 15 minutes
+SESSION_TOKEN_LIFETIME = 15 * 60
+
+# Session token is refreshed this many seconds before it's expired
+SESSION_REFRESH_MARGIN = 60
+
 class Login(POST):
     path = '/auth/login'
 
@@ -26,7 +26,11 @@ class RequireLogin:
         if not isinstance(token, str):
             raise ValueError('token must be str')
         
-        self.headers['Authorization'] = f'Bearer {token}'
+        # Headers are stored in the route instance, BaseRoute.headers
+        # is shared by every route (and every client)
+        headers = BaseRoute.headers.copy()
+        headers['Authorization'] = f'Bearer {token}'
+        self.headers = headers
 
 class GET(BaseRoute):
     method = 'GET'
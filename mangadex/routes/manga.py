@@ -1,5 +1,6 @@
+import copy
 import re
-import uuid
+from types import MappingProxyType
 
 from typing import List, Literal, Union
 from datetime import datetime
@@ -11,7 +12,66 @@ __all__ = (
     'MangaList',
 )
 
+# Precompiled validators, shared by all routes
+
+# UUID in canonical form (hyphens are optional), without braces or "urn:uuid:" prefix
+_re_uuid = re.compile(r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$')
+_re_datetime = re.compile(r'^\d{4}-[0-1]\d-([0-2]\d|3[0-1])T([0-1]\d|2[0-3]):[0-5]\d:[0-5]\d$')
+
+_status_values = frozenset(i.value for i in Status)
+_content_rating_values = frozenset(i.value for i in ContentRating)
+_relationship_values = frozenset(i.value for i in Relationship)
+_tags_modes = frozenset(('AND', 'OR'))
+
+def _verify_str_list(values, name: str) -> tuple:
+    if not isinstance(values, (list, tuple)):
+        raise ValueError('%s must be list or tuple' % name)
+    for pos, value in enumerate(values):
+        if not isinstance(value, str):
+            raise ValueError('%s[%s] is not str' % (name, pos))
+    return tuple(values)
+
+def _verify_uuid_list(values, name: str) -> tuple:
+    if not isinstance(values, (list, tuple)):
+        raise ValueError('%s must be list or tuple' % name)
+    for pos, value in enumerate(values):
+        if not isinstance(value, str) or _re_uuid.match(value) is None:
+            raise ValueError('%s[%s] is not a uuid' % (name, pos))
+    return tuple(values)
+
+def _verify_enum_list(values, name: str, enum, enum_values: frozenset) -> tuple:
+    # Return tuple of enum values
+    if not isinstance(values, (list, tuple)):
+        raise ValueError('%s must be list or tuple' % name)
+    result = []
+    for pos, value in enumerate(values):
+        if isinstance(value, enum):
+            result.append(value.value)
+        elif isinstance(value, str):
+            if value not in enum_values:
+                raise ValueError('%s[%s] is not valid %s' % (name, pos, enum.__name__))
+            result.append(value)
+        else:
+            raise ValueError('%s[%s] must be %s or str' % (name, pos, enum.__name__))
+    return tuple(result)
+
+def _verify_datetime(value, name: str) -> str:
+    # Return formatted datetime
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    elif isinstance(value, str):
+        if _re_datetime.match(value) is None:
+            raise ValueError('"%s" is not valid datetime string' % value)
+        return value
+    raise ValueError('%s must be datetime or str' % name)
+
 class MangaList(GET):
+    """Search manga route
+
+    All parameters are validated and normalized once into query params,
+    use :meth:`MangaList.with_page()` to get other pages of the same search
+    without validating it again.
+    """
     path = '/manga'
 
     def __init__(
@@ -37,330 +97,179 @@ class MangaList(GET):
         order,
         includes,
     ) -> None:
-        # verify limit
-        if not isinstance(limit, int):
-            raise ValueError('limit must be int')
-        elif limit > 100 or limit <= 0:
-            raise ValueError('limit range must from 1 to 100')
-        self.limit = limit
-        
-        # verify offset
-        if offset:
-            if not isinstance(offset, int):
-                raise ValueError('offset must be int')
-            elif offset <= 0:
-                raise ValueError('offset cannot lower than 0')
-        self.offset = offset
-        
+        self._set_page(limit, offset)
+
+        # Normalized query params (except limit and offset)
+        param = {}
+
         # verify title
         if title:
             if not isinstance(title, str):
                 raise ValueError('title must be str')
+            param['title'] = title
         self.title = title
 
         # verify authors
         if authors:
-            if isinstance(authors, list) or isinstance(authors, tuple):
-                for pos in range(len(authors)):
-                    author = authors[pos]
-                    if not isinstance(author, str):
-                        raise ValueError('authors[%s] is not str' % pos)
-            else:
-                raise ValueError('authors must be list or tuple')
+            param['authors[]'] = _verify_str_list(authors, 'authors')
         self.authors = authors
 
         # verify artists
         if artists:
-            if isinstance(artists, list) or isinstance(artists, tuple):
-                for pos in range(len(artists)):
-                    artist = artists[pos]
-                    if not isinstance(artist, str):
-                        raise ValueError('artists[%s] is not a str' % pos)
-            else:
-                raise ValueError('artists must be list or tuple')
+            param['artists[]'] = _verify_str_list(artists, 'artists')
         self.artists = artists
         
         # verify year
         if year:
             if not isinstance(year, int):
                 raise ValueError('year must be int')
+            param['year'] = year
         self.year = year
 
         # verify included_tags
         if included_tags:
-            if isinstance(included_tags, list) or isinstance(included_tags, tuple):
-                for pos in range(len(included_tags)):
-                    included_tag = included_tags[pos]
-                    try:
-                        uuid.UUID(included_tag, version=4)
-                    except ValueError:
-                        raise ValueError('included_tags[%s] is not a uuid' % pos) from None
-            else:
-                raise ValueError('included_tags must be list or tuple')
+            param['includedTags[]'] = _verify_uuid_list(included_tags, 'included_tags')
         self.included_tags = included_tags
         
         # verify included_tags_mode
-        if included_tags_mode not in ['AND', 'OR']:
+        if included_tags_mode not in _tags_modes:
             raise ValueError('included_tags_mode must be "AND" or "OR"')
+        param['includedTagsMode'] = included_tags_mode
         self.included_tags_mode = included_tags_mode
         
         # verify excluded_tags
         if excluded_tags:
-            if isinstance(excluded_tags, list) or isinstance(excluded_tags, tuple):
-                for pos in range(len(excluded_tags)):
-                    excluded_tag = excluded_tags[pos]
-                    try:
-                        uuid.UUID(excluded_tag, version=4)
-                    except ValueError:
-                        raise ValueError('excluded_tags[%s] is not a uuid' % pos) from None
-            else:
-                raise ValueError('excluded_tags must be list or tuple')
+            param['excludedTags[]'] = _verify_uuid_list(excluded_tags, 'excluded_tags')
         self.excluded_tags = excluded_tags
         
         # verify excluded_tags_mode
-        if excluded_tags_mode not in ['AND', 'OR']:
+        if excluded_tags_mode not in _tags_modes:
             raise ValueError('excluded_tags_mode must be "AND" or "OR"')
+        param['excludedTagsMode'] = excluded_tags_mode
         self.excluded_tags_mode = excluded_tags_mode
         
         # verify status
         if status:
             if isinstance(status, Status):
-                pass
+                param['status[]'] = status.value
             elif isinstance(status, str):
-                if status not in list(i.value for i in Status):
+                if status not in _status_values:
                     raise ValueError('Invalid manga status')
+                param['status[]'] = status
             else:
                 raise ValueError('status must be MangaStatus or str')
         self.status = status
 
-        langs = list(i.value for i in MangaDexLanguage)
-
         # verify original_language
         if original_language:
-            if isinstance(original_language, list) or isinstance(original_language, tuple):
-                for pos in range(len(original_language)):
-                    lang = original_language[pos]
-                    if isinstance(lang, MangaDexLanguage):
-                        pass
-                    elif isinstance(lang, str):
-                        if lang not in langs:
-                            raise ValueError('original_language[%s] is not valid language' % pos)
-                    else:
-                        raise ValueError('original_language[%s] must be MangaDexLanguage or str' % pos)
-            else:
-                raise ValueError('original_language must be tuple or list')
+            param['originalLanguage[]'] = _verify_enum_list(
+                original_language,
+                'original_language',
+                MangaDexLanguage,
+                LANGUAGE_VALUES
+            )
         self.original_language = original_language
 
         # verify excluded_original_language
         if excluded_original_language:
-            if isinstance(excluded_original_language, list) or isinstance(excluded_original_language, tuple):
-                for pos in range(len(excluded_original_language)):
-                    lang = excluded_original_language[pos]
-                    if isinstance(lang, MangaDexLanguage):
-                        pass
-                    elif isinstance(lang, str):
-                        if lang not in langs:
-                            raise ValueError('excluded_original_language[%s] is not valid language' % pos)
-                    else:
-                        raise ValueError('excluded_original_language[%s] must be MangaDexLanguage or str' % pos)
-            else:
-                raise ValueError('excluded_original_language must be tuple or list')
+            param['excludedOriginalLanguage[]'] = _verify_enum_list(
+                excluded_original_language,
+                'excluded_original_language',
+                MangaDexLanguage,
+                LANGUAGE_VALUES
+            )
         self.excluded_original_language = excluded_original_language
 
         # verify available_translated_language
         if available_translated_language:
-            if isinstance(available_translated_language, list) or isinstance(available_translated_language, tuple):
-                for pos in range(len(available_translated_language)):
-                    lang = available_translated_language[pos]
-                    if isinstance(lang, MangaDexLanguage):
-                        pass
-                    elif isinstance(lang, str):
-                        if lang not in langs:
-                            raise ValueError('available_translated_language[%s] is not valid language' % pos)
-                    else:
-                        raise ValueError('available_translated_language[%s] must be MangaDexLanguage or str' % pos)
-            else:
-                raise ValueError('available_translated_language must be tuple or list')
+            param['availableTranslatedLanguage[]'] = _verify_enum_list(
+                available_translated_language,
+                'available_translated_language',
+                MangaDexLanguage,
+                LANGUAGE_VALUES
+            )
         self.available_translated_language = available_translated_language
 
         # verify ids
         if ids:
-            if not isinstance(ids, list):
-                raise ValueError('ids must be list or tuple')
-            else:
-                if len(ids) > 100:
-                    raise ValueError('ids cannot be more than 100')
-                for pos in range(len(ids)):
-                    _id = ids[pos]
-                    try:
-                        uuid.UUID(_id, version=4)
-                    except ValueError:
-                        raise ValueError('ids[%s] is not uuid' % _id)
+            ids_param = _verify_uuid_list(ids, 'ids')
+            if len(ids_param) > 100:
+                raise ValueError('ids cannot be more than 100')
+            param['ids[]'] = ids_param
         self.ids = ids
 
         # verify content_rating
-        if isinstance(content_rating, list) or isinstance(content_rating, tuple):
-            c_rating_values = list(i.value for i in content_rating)
-            for pos in range(len(content_rating)):
-                cr = content_rating[pos]
-                if isinstance(cr, ContentRating):
-                    pass
-                elif isinstance(cr, str):
-                    if cr not in c_rating_values:
-                        raise ValueError('content_rating[%s] is not valid content rating' % pos)
-                else:
-                    raise ValueError('content_rating must be ContentRating or str')
-        else:
-            raise ValueError('content_rating must be list or tuple')
+        param['contentRating[]'] = _verify_enum_list(
+            content_rating,
+            'content_rating',
+            ContentRating,
+            _content_rating_values
+        )
         self.content_rating = content_rating
 
-        re_datetime = re.compile(r'^\d{4}-[0-1]\d-([0-2]\d|3[0-1])T([0-1]\d|2[0-3]):[0-5]\d:[0-5]\d$')
-
         # verify created_at_since
         if created_at_since:
-            if isinstance(created_at_since, datetime):
-                pass
-            elif isinstance(created_at_since, str):
-                result = re_datetime.match(created_at_since)
-                if not result:
-                    raise ValueError('"%s" is not valid datetime string' % result)
-            else:
-                raise ValueError('created_at_since must be datetime or str')
+            param['createdAtSince'] = _verify_datetime(created_at_since, 'created_at_since')
         self.created_at_since = created_at_since
 
         # verify updated_at_since
         if updated_at_since:
-            if isinstance(updated_at_since, datetime):
-                pass
-            elif isinstance(updated_at_since, str):
-                result = re_datetime.match(updated_at_since)
-                if not result:
-                    raise ValueError('"%s" is not valid datetime string' % result)
-            else:
-                raise ValueError('updated_at_since must be datetime or str')
+            param['updatedAtSince'] = _verify_datetime(updated_at_since, 'updated_at_since')
         self.updated_at_since = updated_at_since
 
         # verify order
         if order:
             if not isinstance(order, MangaListOrder):
                 raise ValueError('order must be a MangaListOrder')
+            for key, value in order.params.items():
+                param['order[%s]' % key] = value
         self.order = order
         
         # verify includes
         if includes:
-            if isinstance(includes, list) or isinstance(includes, tuple):
-                include_values = list(i.value for i in includes)
-                for pos in range(len(includes)):
-                    include = includes[pos]
-                    if isinstance(include, Relationship):
-                        pass
-                    elif isinstance(include, str):
-                        if include not in include_values:
-                            raise ValueError('includes[%s] is not valid Relationship' % pos)
-                    else:
-                        raise ValueError('includes[%s] must be Relationship or str' % pos)
-            else:
-                raise ValueError('includes must be list or tuple')
+            param['includes[]'] = _verify_enum_list(
+                includes,
+                'includes',
+                Relationship,
+                _relationship_values
+            )
         self.includes = includes
 
+        # Read-only, shared by all pages (see with_page())
+        self._params = MappingProxyType(param)
+
+    def _set_page(self, limit, offset):
+        # verify limit
+        if not isinstance(limit, int):
+            raise ValueError('limit must be int')
+        elif limit > 100 or limit <= 0:
+            raise ValueError('limit range must from 1 to 100')
+        self.limit = limit
+        
+        # verify offset
+        if offset:
+            if not isinstance(offset, int):
+                raise ValueError('offset must be int')
+            elif offset <= 0:
+                raise ValueError('offset cannot lower than 0')
+        self.offset = offset
+
+    def with_page(self, offset: int, limit: int) -> "MangaList":
+        """Return the same search with another page, only ``offset``
+        and ``limit`` are validated"""
+        route = copy.copy(self)
+        route._set_page(limit, offset)
+        return route
+
     def build_request(self) -> dict:
         request_param = super().build_request(self.path)
-        param = {}
+        param = self._params.copy()
         request_param['params'] = param
 
         param['limit'] = self.limit
 
         if self.offset:
             param['offset'] = self.offset
-        
-        if self.title:
-            param['title'] = self.title
-        
-        if self.authors:
-            param['authors[]'] = self.authors
-        
-        if self.artists:
-            param['artists[]'] = self.artists
-
-        if self.year:
-            param['year'] = self.year
-        
-        if self.included_tags:
-            param['includedTags[]'] = self.included_tags
-
-        param['includedTagsMode'] = self.included_tags_mode
-
-        if self.excluded_tags:
-            param['excludedTags[]'] = self.excluded_tags
-        
-        param['excludedTagsMode'] = self.excluded_tags_mode
-
-        if self.status:
-            param['status[]'] = self.status
-        
-        original_lang = []
-        if self.original_language:
-            for lang in self.original_language:
-                if isinstance(lang, MangaDexLanguage):
-                    original_lang.append(lang.value)
-                else: # str instance
-                    original_lang.append(lang)
-            param['originalLanguage[]'] = original_lang
-
-        excluded_original_lang = []
-        if self.excluded_original_language:
-            for lang in self.excluded_original_language:
-                if isinstance(lang, MangaDexLanguage):
-                    excluded_original_lang.append(lang.value)
-                else: # str instance
-                    excluded_original_lang.append(lang)
-            param['excludedOriginalLanguage[]'] = self.excluded_original_language
-        
-        available_translated_lang = []
-        if self.available_translated_language:
-            for lang in self.available_translated_language:
-                if isinstance(lang, MangaDexLanguage):
-                    available_translated_lang.append(lang.value)
-                else:
-                    available_translated_lang.append(lang)
-            param['availableTranslatedLanguage[]'] = self.available_translated_language
-        
-        if self.ids:
-            param['ids[]'] = self.ids
-        
-        content_ratings = []
-        for content_rating in self.content_rating:
-            if isinstance(content_rating, ContentRating):
-                content_ratings.append(content_rating.value)
-            else: # str instance
-                content_ratings.append(content_rating)
-        param['contentRating[]'] = content_ratings
-
-        if self.created_at_since:
-            if isinstance(self.created_at_since, datetime):
-                created_at_since = self.created_at_since.strftime('%Y-%m-%dT%H:%M:%S')
-            else:
-                created_at_since = self.created_at_since
-            param['createdAtSince'] = created_at_since
-        
-        if self.updated_at_since:
-            if isinstance(self.updated_at_since, datetime):
-                updated_at_since = self.updated_at_since.strftime('%Y-%m-%dT%H:%M:%S')
-            else:
-                updated_at_since = self.updated_at_since
-            param['updatedAtSince'] = updated_at_since
-        
-        if self.order:
-            param['order'] = self.order.params
-        
-        includes = []
-        if self.includes:
-            for include in includes:
-                if isinstance(include, Relationship):
-                    includes.append(include.value)
-                else: # str instance
-                    includes.append(include)
-            param['includes[]'] = includes
 
         return request_param
 
@@ -0,0 +1,148 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Iterator, List
+from .client import Client
+from .manga import Manga
+
+__all__ = (
+    'SyncClient', 'SyncMangaIterator'
+)
+
+class SyncMangaIterator:
+    """Synchronous iterator for :class:`MangaIterator`
+
+    Every item is fetched in the event loop of :class:`SyncClient`.
+    Use :meth:`close()` or ``with`` statement to cancel prefetched pages
+    when the iterator is not exhausted.
+    """
+    def __init__(self, client: "SyncClient", iterator) -> None:
+        self._client = client
+        self._iterator = iterator
+
+    def __iter__(self) -> Iterator[Manga]:
+        return self
+
+    async def _next(self):
+        try:
+            return True, await self._iterator.__anext__()
+        except StopAsyncIteration:
+            return False, None
+
+    def __next__(self) -> Manga:
+        ok, manga = self._client._call(self._next())
+        if not ok:
+            raise StopIteration()
+        return manga
+
+    def flatten(self) -> List[Manga]:
+        """Fetch all manga in one call"""
+        return self._client._call(self._iterator.flatten())
+
+    def close(self) -> None:
+        """Cancel all prefetched pages, in the event loop of :class:`SyncClient`"""
+        if self._client._loop.is_closed():
+            return
+        self._client._call(self._iterator.aclose())
+
+    def __enter__(self) -> "SyncMangaIterator":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+class SyncClient:
+    """Thread-safe synchronous MangaDex client
+
+    :class:`SyncClient` owns a background thread running an event loop with
+    one :class:`Client` in it. All methods are blocking and can be called from
+    many threads at once, all of them share one connection pool,
+    response cache and rate limit budget.
+
+    Parameters
+    -----------
+    timeout: Optional[:class:`float`]
+        Timeout (in seconds) for each blocking call, ``None`` for no timeout.
+    **options
+        Same parameters as :class:`Client` (except ``loop``).
+    """
+    def __init__(self, timeout: float = None, **options) -> None:
+        if 'loop' in options:
+            raise ValueError('SyncClient is running its own event loop')
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            name='mangadex-sync-client',
+            daemon=True
+        )
+        self._thread.start()
+
+        # Client must be created inside the event loop thread
+        self._client = self._call(self._create_client(options))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    async def _create_client(self, options) -> Client:
+        return Client(loop=self._loop, **options)
+
+    def _call(self, coro):
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError('SyncClient cannot be called from its own event loop')
+        elif self._loop.is_closed():
+            coro.close()
+            raise RuntimeError('SyncClient is closed')
+        fut = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return fut.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Don't leave the coroutine running in background event loop
+            fut.cancel()
+            raise
+
+    @property
+    def client(self) -> Client:
+        """The :class:`Client` running in background event loop"""
+        return self._client
+
+    def login(self, *args, **kwargs):
+        """Blocking version of :meth:`Client.login()`"""
+        return self._call(self._client.login(*args, **kwargs))
+
+    def logout(self):
+        """Blocking version of :meth:`Client.logout()`"""
+        return self._call(self._client.logout())
+
+    async def _search_manga(self, kwargs):
+        # MangaIterator must be created inside the event loop thread
+        return self._client.search_manga(**kwargs)
+
+    def search_manga(self, **kwargs) -> SyncMangaIterator:
+        """Synchronous version of :meth:`Client.search_manga()`
+
+        Returns
+        --------
+        :class:`SyncMangaIterator`
+        """
+        iterator = self._call(self._search_manga(kwargs))
+        return SyncMangaIterator(self, iterator)
+
+    def close(self) -> None:
+        """Close the client and stop the background event loop"""
+        if self._loop.is_closed():
+            return
+        try:
+            self._call(self._client.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,116 @@
+import json
+import threading
+from typing import Optional, Union
+from .utils.file import atomic_write
+
+try:
+    from cryptography.fernet import Fernet
+except ImportError:
+    Fernet = None
+
+__all__ = (
+    'StoredToken', 'TokenStore', 'FileTokenStore'
+)
+
+class StoredToken:
+    """Session and refresh token persisted by :class:`TokenStore`
+
+    ``refreshed_at`` is UNIX timestamp when the session token is issued.
+    """
+    __slots__ = ('session_token', 'refresh_token', 'refreshed_at')
+
+    def __init__(self, session_token: str, refresh_token: str, refreshed_at: float) -> None:
+        self.session_token = session_token
+        self.refresh_token = refresh_token
+        self.refreshed_at = refreshed_at
+
+    def to_dict(self) -> dict:
+        return {
+            'session_token': self.session_token,
+            'refresh_token': self.refresh_token,
+            'refreshed_at': self.refreshed_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoredToken":
+        return cls(data['session_token'], data['refresh_token'], data['refreshed_at'])
+
+class TokenStore:
+    """Base class for persistent token storage used by :class:`Client`
+
+    Tokens are stored per account name (username or email), subclass this
+    to store tokens in your own backend (database, secret manager, ...).
+    """
+    def load(self, name: str) -> Optional[StoredToken]:
+        """Load token of given account, return ``None`` if there is no token"""
+        raise NotImplementedError
+
+    def save(self, name: str, token: StoredToken) -> None:
+        """Save token of given account"""
+        raise NotImplementedError
+
+    def delete(self, name: str) -> None:
+        """Delete token of given account, if any"""
+        raise NotImplementedError
+
+class FileTokenStore(TokenStore):
+    """Store tokens in JSON file
+
+    The file is only readable and writable by its owner and
+    replaced atomically on every save.
+
+    Parameters
+    -----------
+    path: :class:`str`
+        Path to the file.
+    key: Optional[Union[:class:`str`, :class:`bytes`]]
+        If given, the file is encrypted with this key using
+        `Fernet <https://cryptography.io/en/latest/fernet/>`_
+        (``cryptography`` must be installed), use ``Fernet.generate_key()`` to create one.
+    """
+    def __init__(self, path: str, key: Union[str, bytes] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._fernet = None
+        if key is not None:
+            if Fernet is None:
+                raise ImportError('cryptography is not installed, it is required for encrypted FileTokenStore')
+            self._fernet = Fernet(key)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+
+        if self._fernet is not None:
+            data = self._fernet.decrypt(data)
+        return json.loads(data)
+
+    def _write(self, data: dict):
+        data = json.dumps(data).encode('utf-8')
+        if self._fernet is not None:
+            data = self._fernet.encrypt(data)
+
+        # The file is created with 0o600 permissions
+        atomic_write(self.path, data, '.tokens-')
+
+    def load(self, name):
+        with self._lock:
+            data = self._read().get(name)
+        if data is None:
+            return None
+        return StoredToken.from_dict(data)
+
+    def save(self, name, token):
+        with self._lock:
+            data = self._read()
+            data[name] = token.to_dict()
+            self._write(data)
+
+    def delete(self, name):
+        with self._lock:
+            data = self._read()
+            if data.pop(name, None) is not None:
+                self._write(data)
@@ -1,8 +1,10 @@
 from enum import Enum
-from typing import Literal
+from types import MappingProxyType
+from typing import Literal, Mapping, Optional, Union
 
 __all__ = (
-    'MangaDexLanguage',
+    'MangaDexLanguage', 'LANGUAGES_BY_VALUE', 'LANGUAGES_BY_NAME',
+    'LANGUAGE_VALUES', 'LEGACY_LANGUAGE_CODES', 'get_language'
 )
 
 # Adapted from https://github.com/tachiyomiorg/tachiyomi-extensions/blob/master/src/all/mangadex/src/eu/kanade/tachiyomi/extension/all/mangadex/MangaDexFactory.kt#L54-L95
@@ -48,4 +50,51 @@ class MangaDexLanguage(Enum):
     Hebrew = 'he'
     Hindi = 'hi'
     Norwegian = 'no'
-    Other = 'null'
\ No newline at end of file
+    Other = 'null'
+
+# Lookup tables for MangaDexLanguage, generated once on import
+LANGUAGES_BY_VALUE: Mapping[str, MangaDexLanguage] = MappingProxyType(
+    {i.value: i for i in MangaDexLanguage}
+)
+LANGUAGES_BY_NAME: Mapping[str, MangaDexLanguage] = MappingProxyType(
+    dict(MangaDexLanguage.__members__)
+)
+LANGUAGE_VALUES = frozenset(LANGUAGES_BY_VALUE)
+
+# Legacy (flag) language codes from MangaDexLanguageCodesCSV.txt.
+# Codes that are conflicting with MangaDexLanguage values
+# ("my" is Malay here, but Burmese in MangaDexLanguage) are left out.
+_LEGACY_LANGUAGE_CODES = {
+    'sa': MangaDexLanguage.Arabic,
+    'bd': MangaDexLanguage.Bengali,
+    'mm': MangaDexLanguage.Burmese,
+    'ct': MangaDexLanguage.Catalan,
+    'cn': MangaDexLanguage.ChineseSimplified,
+    'hk': MangaDexLanguage.ChineseTraditional,
+    'cz': MangaDexLanguage.Czech,
+    'dk': MangaDexLanguage.Danish,
+    'gb': MangaDexLanguage.English,
+    'ph': MangaDexLanguage.Filipino,
+    'gr': MangaDexLanguage.Greek,
+    'il': MangaDexLanguage.Hebrew,
+    'in': MangaDexLanguage.Hindi,
+    'jp': MangaDexLanguage.Japanese,
+    'kr': MangaDexLanguage.Korean,
+    'ir': MangaDexLanguage.Persian,
+    'br': MangaDexLanguage.PortugueseBrazil,
+    'rs': MangaDexLanguage.SerboCroatian,
+    'mx': MangaDexLanguage.SpanishLTAM,
+    'se': MangaDexLanguage.Swedish,
+    'ua': MangaDexLanguage.Ukrainian,
+    'vn': MangaDexLanguage.Vietnamese,
+}
+LEGACY_LANGUAGE_CODES: Mapping[str, MangaDexLanguage] = MappingProxyType(
+    {k: v for k, v in _LEGACY_LANGUAGE_CODES.items() if k not in LANGUAGES_BY_VALUE}
+)
+
+def get_language(code: Union[str, MangaDexLanguage]) -> Optional[MangaDexLanguage]:
+    """Get :class:`MangaDexLanguage` from language code (or legacy language code),
+    return ``None`` if the language is unknown"""
+    if isinstance(code, MangaDexLanguage):
+        return code
+    return LANGUAGES_BY_VALUE.get(code) or LEGACY_LANGUAGE_CODES.get(code)
\ No newline at end of file
@@ -1,7 +1,10 @@
+import logging
 import uuid
 from enum import Enum
-from .base import MangaDexLanguage
-from ..errors import ConverterError
+from typing import Dict, Iterable, List, Optional, Union
+from .base import MangaDexLanguage, get_language
+
+log = logging.getLogger(__name__)
 
 class Status(Enum):
     ONGOING = 'ongoing'
@@ -33,8 +36,11 @@ class Relationship(Enum):
     USER = 'user'
     CUSTOM_LIST = 'custom_list'
 
+def _int_conv(x):
+    return str(int(x))
+
 class LinkData:
-    int_conv = lambda x: str(int(x))
+    int_conv = _int_conv
 
     # Each REFS (References) has key, name, url, and converters
     REFS = [
@@ -42,7 +48,7 @@ class LinkData:
             'al',
             'AniList',
             'https://anilist.co/manga/{}',
-            [int_conv]
+            [_int_conv]
         ],
         [
             'ap',
@@ -63,7 +69,7 @@ class LinkData:
             'mu',
             'Mangaupdates',
             'https://www.mangaupdates.com/series.html?id={}',
-            [int_conv]
+            [_int_conv]
         ],
         [
             'nu',
@@ -76,7 +82,7 @@ class LinkData:
             'Kitsu',
             'https://kitsu.io/api/edge/manga{}',
             [
-                lambda x: '/%s' % int_conv(x),
+                lambda x: '/%s' % _int_conv(x),
                 lambda x: '?filter[slug]=%s' % x
             ]
         ],
@@ -96,7 +102,7 @@ class LinkData:
             'mal',
             'MyAnimeList',
             'https://myanimelist.net/manga/{}',
-            [int_conv]
+            [_int_conv]
         ],
         [
             'cdj',
@@ -118,41 +124,132 @@ class LinkData:
         ]
     ]
 
+    # Index of REFS by key, built once (see below the class)
+    _INDEX = {}
+
+    __slots__ = ('name', 'key_site', 'slug_or_id', '_url', '_converters')
+
     def __init__(self, site, slug_or_id) -> None:
-        for key, name, url, converters in self.REFS:
-            if key == site:
-                break
-        
+        try:
+            name, self._url, self._converters = self._INDEX[site]
+        except KeyError:
+            # Unknown site, leave it as it is
+            name, self._url, self._converters = site, '{}', (str,)
+
         self.name = name
-        self.key_site = key
+        self.key_site = site
         self.slug_or_id = slug_or_id
-        
-        exceptions = []
-        for converter in converters:
-            try:
-                self.url = url.format(converter(slug_or_id))
-            except Exception as e:
-                exceptions.append(e)
-        if exceptions:
-            raise ConverterError('converter is failing, %s' % exceptions)
 
     def __str__(self) -> str:
         return '<MangaLinkData source="%s" link="%s">' % (
             self.name,
-            self.url
+            self.get_link()
         )
 
-    def get_link(self) -> str:
-        return self.url
+    @property
+    def url(self) -> Optional[str]:
+        return self.get_link()
+
+    def get_link(self) -> Optional[str]:
+        """Get the link, the first converter that succeed is used
+
+        Return ``None`` if all converters are failing (invalid ``slug_or_id``),
+        the raw value is still available in :attr:`LinkData.slug_or_id`.
+        """
+        converters = self._converters
+        if converters is None:
+            # Already formatted
+            return self._url
+
+        exceptions = []
+        for converter in converters:
+            try:
+                url = self._url.format(converter(self.slug_or_id))
+            except ValueError as e:
+                # Invalid value for this converter, other errors are bugs
+                exceptions.append(e)
+            else:
+                self._url = url
+                self._converters = None
+                return url
+
+        log.debug('Failed to convert link "%s" of "%s" (%s)' % (self.slug_or_id, self.key_site, exceptions))
+        self._url = None
+        self._converters = None
+        return None
+
+LinkData._INDEX = {key: (name, url, tuple(converters)) for key, name, url, converters in LinkData.REFS}
+
+def parse_links(links: Dict[str, str]) -> Dict[str, LinkData]:
+    """Parse ``links`` attribute of manga in one pass
+
+    Links are converted when :meth:`LinkData.get_link()` is called,
+    invalid links are kept but their URL is ``None``.
+    """
+    if not links:
+        return {}
+    return {site: LinkData(site, slug_or_id) for site, slug_or_id in links.items()}
+
+# Default fallback languages for Title.get()
+_TITLE_FALLBACK = ('en',)
 
 class Title:
-    def __init__(self, data) -> None:
-        lang = list(data.keys())[0]
-        self.language = MangaDexLanguage(lang)
-        self.title = data.get(lang)
+    """Localized title (or description) in one or more languages
 
-    def __str__(self) -> str:
+    The first language in the data is the main language.
+    """
+    __slots__ = ('_titles',)
+
+    def __init__(self, data: Dict[str, str]) -> None:
+        # Language code -> title
+        self._titles = data or {}
+
+    @property
+    def language(self) -> Optional[MangaDexLanguage]:
+        """Main language, ``None`` if the language is unknown"""
+        for lang in self._titles:
+            return get_language(lang)
+        return None
+
+    @property
+    def title(self) -> Optional[str]:
+        """Title in main language"""
+        for title in self._titles.values():
+            return title
+        return None
+
+    @property
+    def languages(self) -> List[str]:
+        """Available language codes"""
+        return list(self._titles)
+
+    def get(
+        self,
+        lang: Union[MangaDexLanguage, str] = None,
+        fallback: Iterable[Union[MangaDexLanguage, str]] = _TITLE_FALLBACK
+    ) -> Optional[str]:
+        """Get title in given language
+
+        If it's not available, languages in ``fallback`` are tried in order
+        and then the main title is returned.
+        """
+        titles = self._titles
+        if lang is not None:
+            title = titles.get(getattr(lang, 'value', lang))
+            if title is not None:
+                return title
+
+        for lang in fallback:
+            title = titles.get(getattr(lang, 'value', lang))
+            if title is not None:
+                return title
         return self.title
+
+    def __contains__(self, lang: Union[MangaDexLanguage, str]) -> bool:
+        return getattr(lang, 'value', lang) in self._titles
+
+    def __str__(self) -> str:
+        return self.title or ''
     
     def __repr__(self) -> str:
-        return self.title
\ No newline at end of file
+        return self.title or ''
@@ -0,0 +1,24 @@
+import os
+import tempfile
+
+__all__ = (
+    'atomic_write',
+)
+
+def atomic_write(path: str, data: bytes, prefix: str = '.tmp-') -> None:
+    """Write ``data`` to ``path`` atomically
+
+    The data is written to temporary file (created with ``0o600`` permissions)
+    in the same directory first and then the temporary file replace the old one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,92 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Set, Tuple
+from .utils.file import atomic_write
+
+__all__ = (
+    'Watermark', 'FileWatermark', 'SQLiteWatermark'
+)
+
+class Watermark:
+    """Base class for persistent watermark storage used by :meth:`Client.watch_updates()`
+
+    A watermark is the latest ``updatedAt`` (naive UTC datetime) that has been
+    processed by a feed and IDs of manga processed with that exact ``updatedAt``.
+    """
+    def load(self, name: str) -> Optional[Tuple[datetime, Set[str]]]:
+        """Load watermark of given feed name, return ``None`` if there is no watermark"""
+        raise NotImplementedError
+
+    def save(self, name: str, updated_at: datetime, ids: Iterable[str]) -> None:
+        """Save watermark of given feed name atomically"""
+        raise NotImplementedError
+
+class FileWatermark(Watermark):
+    """Store watermarks in JSON file
+
+    The file is replaced atomically on every save.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def load(self, name):
+        with self._lock:
+            data = self._read().get(name)
+        if data is None:
+            return None
+        return datetime.fromisoformat(data['updated_at']), set(data['ids'])
+
+    def save(self, name, updated_at, ids):
+        with self._lock:
+            data = self._read()
+            data[name] = {
+                'updated_at': updated_at.isoformat(),
+                'ids': sorted(ids)
+            }
+
+            atomic_write(self.path, json.dumps(data).encode('utf-8'), '.watermark-')
+
+class SQLiteWatermark(Watermark):
+    """Store watermarks in SQLite database"""
+    def __init__(self, path: str, table: str = 'mangadex_watermarks') -> None:
+        if not table.isidentifier():
+            raise ValueError('"%s" is not valid table name' % table)
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS %s '
+                '(name TEXT PRIMARY KEY, updated_at TEXT NOT NULL, ids TEXT NOT NULL)' % table
+            )
+
+    def load(self, name):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT updated_at, ids FROM %s WHERE name = ?' % self.table,
+                (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return datetime.fromisoformat(row[0]), set(json.loads(row[1]))
+
+    def save(self, name, updated_at, ids):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO %s (name, updated_at, ids) VALUES (?, ?, ?)' % self.table,
+                (name, updated_at.isoformat(), json.dumps(sorted(ids)))
+            )
+
+    def close(self) -> None:
+        self._conn.close()